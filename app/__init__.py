@@ -19,6 +19,7 @@ from flask_migrate import Migrate
 from werkzeug.middleware.proxy_fix import ProxyFix
 
 from . import config, compat
+from .jsonprovider import OrjsonProvider, OrjsonSocketSerialiser
 compat.monkey_patch_sqlite()
 
 LOG = logging.getLogger("hawkspeed")
@@ -54,10 +55,13 @@ def create_app():
     # Then, load config from prefixed environment vars, to overwrite those set there.
     app.config.from_prefixed_env()
     app.url_map.strict_slashes = False
+    # Use orjson to serialise and deserialise all JSON.
+    app.json = OrjsonProvider(app)
     db.init_app(app)
     migrate.init_app(app, db)
     login_manager.init_app(app)
-    socketio.init_app(app)
+    socketio.init_app(app,
+        json = OrjsonSocketSerialiser)
     with app.app_context():
         # If required, load the spatialite mod onto the sqlite driver.
         if db.engine.dialect.name == "sqlite":
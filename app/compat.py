@@ -1,7 +1,7 @@
 import sys
 import logging
 
-from sqlalchemy import event, inspect
+from sqlalchemy import event, inspect, func
 from sqlalchemy.types import TypeDecorator, BINARY
 from sqlalchemy.dialects.postgresql import UUID as PostUUID
 
@@ -20,6 +20,24 @@ else:
 insert = insert_
 
 
+def st_dwithin(geometry_a, geometry_b, distance):
+    """Return an expression that is True where the two given geometries are within the given distance of one another, in the units of their CRS. PostGIS' ST_DWithin
+    will be used where available, as it is able to use a spatial index. SpatiaLite does not provide ST_DWithin, so the distance between the geometries is compared instead.
+
+    Arguments
+    ---------
+    :geometry_a: A geometry column or element.
+    :geometry_b: A geometry column or element.
+    :distance: The maximum distance between the two geometries.
+
+    Returns
+    -------
+    A boolean expression."""
+    if config.APP_ENV == "Production" or config.APP_ENV == "LiveDevelopment":
+        return func.ST_DWithin(geometry_a, geometry_b, distance)
+    return func.ST_Distance(geometry_a, geometry_b) <= distance
+
+
 def monkey_patch_sqlite():
     try:
         # First, attempt to import sqlite3, and from it, connect to a memory database. On the database connection, attempt to get enable_load_extension.
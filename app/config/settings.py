@@ -55,7 +55,9 @@ class GeospatialConfigurationMixin():
 
 
 class BaseConfig(private.PrivateBaseConfig, RaceConfigurationMixin, TrackConfigurationMixin, GeospatialConfigurationMixin, SocketConfig, CeleryConfig):
-    SQLALCHEMY_SESSION_OPTS = {}
+    # Do not expire all instances after each commit; the session is removed at the end of each request anyway, and any instances required reloaded before then will
+    # be explicitly expired or refreshed.
+    SQLALCHEMY_SESSION_OPTS = {"expire_on_commit": False}
     SQLALCHEMY_ENGINE_OPTS = {}
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
@@ -66,6 +68,8 @@ class BaseConfig(private.PrivateBaseConfig, RaceConfigurationMixin, TrackConfigu
     SERVER_VERSION_CODE = 13
 
     ACCEPTABLE_MEDIA_TYPES = ["jpg", "png", "gif"]
+    # The method with which to hash all passwords. If None, Werkzeug's default method will be used.
+    PASSWORD_HASH_METHOD = None
 
     # Streaming configuration.
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024 # 16 MB
@@ -133,6 +137,8 @@ class TestConfig(private.PrivateTestConfig, BaseConfig):
     GLOBAL_REPORTING_TIMEZONE = "Etc/GMT"
 
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    # Hash passwords with a single iteration while testing; tests do not require the work factor, only a hash that can be checked.
+    PASSWORD_HASH_METHOD = "pbkdf2:sha256:1"
 
     NUM_METERS_PLAYER_PROXIMITY = 150
     
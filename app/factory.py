@@ -78,6 +78,54 @@ def get_random_user(**kwargs) -> models.User:
     return new_user
 
 
+def get_random_users(num_users, **kwargs) -> List[models.User]:
+    """Use random identities to create and persist a number of User models at once. Each User's first vehicle is created through the vehicles module, but the vehicle
+    stock is located just once; as is the password hashed just once. All Users are then added to the session together.
+
+    Arguments
+    ---------
+    :num_users: The number of Users to create.
+
+    Keyword arguments
+    -----------------
+    :verified: Whether these Users are verified or not. Default is True.
+    :setup: Whether we should setup the Users' profiles. Default is True.
+    :vehicle: The Vehicle to add to each new User. By default 1994 Toyota Supra will be used.
+
+    Returns
+    -------
+    A list of the new Users."""
+    verified = kwargs.get("verified", True)
+    setup = kwargs.get("setup", True)
+    vehicle = kwargs.get("vehicle", "1994 Toyota Supra")
+
+    # The vehicle stock for every User's first vehicle. This will be located upon creating the first User's vehicle.
+    vehicle_stock = None
+    new_users = []
+    for idx in range(num_users):
+        # Get an identity, and make the User.
+        (fn, ln, dob, em, ph) = get_random_identity()
+        new_user = models.User(
+            email_address = em,
+            username = f"{fn} {ln}",
+            verified = verified,
+            profile_setup = setup)
+        # Create the first vehicle for the User. The vehicle stock is located for the first User only, all others will reuse that stock.
+        user_vehicle = vehicles.create_vehicle(vehicles.RequestCreateVehicle(text = vehicle),
+            user = new_user, vehicle_stock = vehicle_stock)
+        vehicle_stock = user_vehicle.stock
+        # Set a bad password; hash it for the first User only, all others can share that hash.
+        if not new_users:
+            new_user.set_password("password")
+        else:
+            new_user.password = new_users[0].password
+        new_users.append(new_user)
+    # Add all to database then return.
+    db.session.add_all(new_users)
+    LOG.debug(f"Created {num_users} random Users.")
+    return new_users
+
+
 def create_user(email_address, password, **kwargs) -> models.User:
     """Create a new user, that is optionally setup. Email address must be unique.
 
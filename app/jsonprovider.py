@@ -0,0 +1,100 @@
+"""A module for serialising and deserialising JSON for Flask, by way of orjson. This replaces Flask's default JSON provider, and therefore all view functions that return
+a dictionary or list, as well as request.get_json, will utilise orjson."""
+import orjson
+import logging
+
+from flask.json.provider import JSONProvider, _default
+
+LOG = logging.getLogger("hawkspeed.jsonprovider")
+LOG.setLevel( logging.DEBUG )
+
+
+class OrjsonProvider(JSONProvider):
+    """A JSON provider that utilises orjson. Any type not natively supported by orjson will be handed to Flask's default serialiser, so this provider will support
+    all the types the default provider does."""
+    # Allow non-string keys to be serialised, just like the default provider. Also pass all dates and datetimes through to the default serialiser, so they are
+    # formatted identically to the default provider.
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    # Sort the keys of all dictionaries, just like the default provider. This can be disabled by setting app.json.sort_keys to False.
+    sort_keys = True
+    # The mimetype for all responses.
+    mimetype = "application/json"
+
+    def dumps(self, obj, **kwargs) -> str:
+        """Serialise the given object to a JSON string.
+
+        Arguments
+        ---------
+        :obj: The object to serialise.
+
+        Keyword arguments
+        -----------------
+        :indent: Whether to indent the output. Only an indent of 2 is supported by orjson, so any indent will be treated as 2.
+        :sort_keys: Whether to sort the keys of all dictionaries. By default, the provider's sort_keys attribute is used.
+
+        Returns
+        -------
+        A JSON string."""
+        option = self.option
+        if kwargs.get("indent", None):
+            option |= orjson.OPT_INDENT_2
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default = _default, option = option).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        """Deserialise the given JSON string or bytes.
+
+        Arguments
+        ---------
+        :s: The JSON string or bytes to deserialise.
+
+        Returns
+        -------
+        The deserialised object."""
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        """Serialise the given arguments to JSON, and return a response with the JSON mimetype. This will serialise straight to bytes, without an intermediary
+        string. Keys will be sorted if the provider's sort_keys attribute is True.
+
+        Returns
+        -------
+        A Response."""
+        obj = self._prepare_response_obj(args, kwargs)
+        option = self.option
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return self._app.response_class(orjson.dumps(obj, default = _default, option = option),
+            mimetype = self.mimetype)
+
+
+class OrjsonSocketSerialiser():
+    """A drop-in replacement for the json module, for use by SocketIO when encoding and decoding packets, such that all emitted payloads are serialised by orjson,
+    in the same way as responses from the JSON provider above."""
+    @staticmethod
+    def dumps(obj, **kwargs) -> str:
+        """Serialise the given object to a JSON string. Any keyword arguments, such as separators, are accepted for compatibility only; orjson's output is always
+        compact. Keys are not sorted, just as they were not by the json module.
+
+        Arguments
+        ---------
+        :obj: The object to serialise.
+
+        Returns
+        -------
+        A JSON string."""
+        return orjson.dumps(obj, default = _default, option = OrjsonProvider.option).decode("utf-8")
+
+    @staticmethod
+    def loads(s, **kwargs):
+        """Deserialise the given JSON string or bytes.
+
+        Arguments
+        ---------
+        :s: The JSON string or bytes to deserialise.
+
+        Returns
+        -------
+        The deserialised object."""
+        return orjson.loads(s)
@@ -18,11 +18,12 @@ from geoalchemy2 import Geometry, shape
 from flask_login import AnonymousUserMixin, UserMixin
 from flask import g
 from sqlalchemy import asc, desc, or_, and_, func, select, case, insert, union_all
-from sqlalchemy import Table, Column, BigInteger, Boolean, Date, DateTime, Numeric, String, Text, ForeignKey, ForeignKeyConstraint, UniqueConstraint
+from sqlalchemy import Table, Column, BigInteger, Boolean, Date, DateTime, Numeric, String, Text, ForeignKey, ForeignKeyConstraint, UniqueConstraint, Index
 from sqlalchemy.types import TypeDecorator, CHAR
 from sqlalchemy.sql.expression import cast
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship, aliased, Mapped, mapped_column, with_polymorphic, declared_attr, column_property, query_expression
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.ext.associationproxy import association_proxy, AssociationProxy
@@ -121,10 +122,16 @@ class PointGeometryMixin(EPSGWrapperMixin):
 
     @property
     def point(self) -> geometry.Point:
-        """Return a XY format Point for this object's longitude & latitude."""
+        """Return a XY format Point for this object's longitude & latitude. The converted Point will be memoised on this instance, and only converted again when
+        the underlying geometry column is changed or reloaded."""
         if not self.point_geom:
             return None
-        return shape.to_shape(self.point_geom)
+        memoised = self.__dict__.get("_point_memoised", None)
+        # If there's no memoised shape, or it was converted from a different geometry element, convert the current one.
+        if not memoised or memoised[0] is not self.point_geom:
+            memoised = (self.point_geom, shape.to_shape(self.point_geom),)
+            self._point_memoised = memoised
+        return memoised[1]
 
     @point.setter
     def point(self, value):
@@ -141,9 +148,16 @@ class PointGeometryMixin(EPSGWrapperMixin):
 
     @property
     def geodetic_point(self):
+        """Return this object's Point, transformed to its geodetic CRS. Like the Point itself, the transformed Point will be memoised on this instance, and only
+        transformed again when the underlying geometry column or the CRS is changed or reloaded."""
         if not self.point_geom:
             return None
-        return ops.transform(self.geodetic_transformer.transform, self.point)
+        memoised = self.__dict__.get("_geodetic_point_memoised", None)
+        # If there's no memoised geodetic point, or it was transformed from a different geometry element or CRS, transform the current one.
+        if not memoised or memoised[0] is not self.point_geom or memoised[1] != self.crs:
+            memoised = (self.point_geom, self.crs, ops.transform(self.geodetic_transformer.transform, self.point),)
+            self._geodetic_point_memoised = memoised
+        return memoised[2]
 
     def set_position(self, point):
         if not self.crs:
@@ -263,9 +277,16 @@ class MultiLineStringGeometryMixin(EPSGWrapperMixin):
 
     @property
     def multi_linestring(self) -> geometry.MultiLineString:
+        """Return this geometry as a Shapely MultiLineString. As converting the geometry is relatively expensive and it is read many times per race update, the
+        result will be memoised on this instance, and only converted again when the underlying geometry column is changed or reloaded."""
         if not self.multi_linestring_geom:
             return None
-        return shape.to_shape(self.multi_linestring_geom)
+        memoised = self.__dict__.get("_multi_linestring_memoised", None)
+        # If there's no memoised shape, or it was converted from a different geometry element, convert the current one.
+        if not memoised or memoised[0] is not self.multi_linestring_geom:
+            memoised = (self.multi_linestring_geom, shape.to_shape(self.multi_linestring_geom),)
+            self._multi_linestring_memoised = memoised
+        return memoised[1]
 
     @multi_linestring.setter
     def multi_linestring(self, value):
@@ -518,21 +539,33 @@ class SnapToRoadOrder(db.Model):
         """Returns True if this entire order is complete."""
         return self.percent_snapped == 100
     
-    @property
+    @hybrid_property
     def num_unsnapped_batches(self):
-        """Return the number of batches required to snap the remaining points."""
-        return math.ceil(self.num_points_unsnapped / config.NUM_POINTS_PER_SNAP_BATCH)
+        """Return the number of batches required to snap the remaining points. This is calculated with integer arithmetic only."""
+        return -(-self.num_points_unsnapped // config.NUM_POINTS_PER_SNAP_BATCH)
+
+    @num_unsnapped_batches.expression
+    def num_unsnapped_batches(cls):
+        """Expression level number of unsnapped batches; that is, the number of unsnapped points plus one less than the batch size, floor divided by the batch size."""
+        return (cls.num_points_unsnapped + (config.NUM_POINTS_PER_SNAP_BATCH - 1)) // config.NUM_POINTS_PER_SNAP_BATCH
     
     @property
     def num_points_snapped(self):
         """Return the number of points in the snapped track."""
         return self.snapped_track.num_points
     
-    @property
+    @hybrid_property
     def num_points_unsnapped(self):
-        """Return the number of points that require snapping. Calculate this value by subtracting the number of snapped points from the number of
-        unsnapped points."""
-        return self.unsnapped_track.num_points - self.snapped_track.num_points
+        """Return the number of points that require snapping. Calculate this value by subtracting the number of snapped points from the static number of
+        points, as points are never removed from the unsnapped track; this way, the unsnapped track's points need not be loaded."""
+        return self.static_num_points - self.snapped_track.num_points
+
+    @num_points_unsnapped.expression
+    def num_points_unsnapped(cls):
+        """Expression level number of points that require snapping. The static number of points, less a count of the points in the snapped track."""
+        return cls.static_num_points - select(func.count(SnapToRoadTrackPoint.id))\
+            .where(SnapToRoadTrackPoint.snap_to_road_track_id == cls.snapped_track_id)\
+            .scalar_subquery()
     
     @property
     def percent_snapped(self):
@@ -575,9 +608,9 @@ class TrackUserRace(db.Model, LineStringGeometryMixin):
     # A foreign key to the user vehicle table. This is the vehicle selected at the start of the race. Can't be None.
     vehicle_id: Mapped[int] = mapped_column(ForeignKey("user_vehicle.id", ondelete = "CASCADE"), nullable = False)
 
-    # A query expression which, at query time, is to be filled with a window function that queries this race's place in the leaderboard. This should only be with'd on
-    # races that are finished, that is, finished is True.
-    finishing_place = query_expression()
+    # This race's place in the track's leaderboard. This is only set on races that are finished, and is recalculated for all finished races on the track each time a race
+    # on that track is finished. Can be None.
+    finishing_place: Mapped[int] = mapped_column(nullable = True, default = None)
     # When this race was started; in milliseconds. This is said to be when the User's client communicates their intent to begin the race. Can't be None.
     started: Mapped[int] = mapped_column(BigInteger(), nullable = False, default = lambda: time.time() * 1000)
     # When this race was completed; in milliseconds. This is said to be when the server determines the race was completed successfully.
@@ -626,6 +659,11 @@ class TrackUserRace(db.Model, LineStringGeometryMixin):
         back_populates = "races_",
         uselist = False)
 
+    # We will add an index on the track ID and finishing place, so a track's leaderboard can be read in order without recalculating each race's place.
+    __table_args__ = (
+        Index(
+            "ix_track_user_race_track_id_finishing_place", "track_id", "finishing_place",),)
+
     def __repr__(self):
         return f"TrackUserRace<{self.track},{self.user},o={self.is_ongoing},dq={self.is_disqualified}>"
 
@@ -716,14 +754,20 @@ class TrackUserRace(db.Model, LineStringGeometryMixin):
         self.vehicle = vehicle
         
     def set_track_and_user(self, track, user):
-        """Setting the track and user."""
+        """Setting the track and user. If this race is ongoing, this will also set the race as the User's loaded ongoing race, so the User does not need to be refreshed
+        to view it. The ongoing race relationship is view only, so it is set as already loaded rather than assigned."""
         self.track = track
         self.user = user
+        # Only set this race as the User's ongoing race if it is actually ongoing; a race may be finished prior to this call. Column defaults are not applied until
+        # flush, so disqualified and cancelled may still be None here, thus is_ongoing can't be used.
+        if self.finished == None and not self.disqualified and not self.cancelled:
+            set_committed_value(user, "ongoing_race_", self)
 
     def set_finished(self, time_finished_ms):
         """Set this race to finished. This supplied timestamp must be in milliseconds."""
         # Set the timestamp we finished at.
         self.finished = time_finished_ms
+        self._clear_user_ongoing_race()
 
     def disqualify(self, dq_reason, **kwargs):
         """A one way function. This will set the disqualified flag to True, and the accompanying arguments."""
@@ -733,10 +777,12 @@ class TrackUserRace(db.Model, LineStringGeometryMixin):
         self.disqualification_reason = dq_reason
         if dq_extra_info:
             self.dq_extra_info = dq_extra_info
+        self._clear_user_ongoing_race()
 
     def cancel(self):
         """A one way function. This will set the cancelled flag to True."""
         self.cancelled = True
+        self._clear_user_ongoing_race()
 
     def set_average_speed(self, average_speed):
         """Set this race's average speed, in meters per second."""
@@ -760,11 +806,17 @@ class TrackUserRace(db.Model, LineStringGeometryMixin):
         self.progress.append(location)
         # Each time we add a new location, we must re-comprehend the progress geometry.
         self._refresh_progress_geometry()
-    
+
     def set_fake(self, fake):
         """Set whether this attempt is fake or not."""
         self.fake = fake
 
+    def _clear_user_ongoing_race(self):
+        """If this race is currently loaded as its User's ongoing race, clear that in memory; as this race is no longer ongoing. This will not load the User's
+        ongoing race if it has not yet been loaded."""
+        if self.user and self.user.__dict__.get("ongoing_race_", None) is self:
+            set_committed_value(self.user, "ongoing_race_", None)
+
     def _refresh_progress_geometry(self):
         """Get all geometries from the list of progress locations, and set the race's progress geometry to the result."""
         # Do not perform this refresh if the race does not yet have sufficient progress.
@@ -778,6 +830,18 @@ class TrackUserRace(db.Model, LineStringGeometryMixin):
         self.set_geometry(progress_geometry)
 
 
+# A partial index on the User ID of all ongoing races, so each User's ongoing race can be found without scanning all of their races. The predicate matches the
+# expression level of TrackUserRace.is_ongoing. Queries must filter on the bare hybrid, not 'is_ongoing == True'; the latter wraps the predicate in a comparison
+# that SQLite can't match to this index. The same applies to TrackUserRace.is_finished, below.
+Index("ix_track_user_race_user_id_ongoing", TrackUserRace.user_id,
+    postgresql_where = TrackUserRace.is_ongoing,
+    sqlite_where = TrackUserRace.is_ongoing)
+# A partial index on the track ID and stopwatch time of all finished races, so finishing places can be calculated by reading each track's finished races in order.
+Index("ix_track_user_race_track_id_finished_stopwatch", TrackUserRace.track_id, TrackUserRace.finished - TrackUserRace.started,
+    postgresql_where = TrackUserRace.finished != None,
+    sqlite_where = TrackUserRace.finished != None)
+
+
 class TrackPath(db.Model, MultiLineStringGeometryMixin):
     """A model specifically for storing the path for a recorded track, as a MultiLineString type geometry. Each LineString is a single segment of the overall track.
     This is associated with at most one Track instance."""
@@ -877,6 +941,12 @@ class TrackRating(db.Model):
     track: Mapped["Track"] = relationship(
         back_populates = "ratings_",
         uselist = False)
+
+    # The composite primary key already serves each User's rating lookup, and prevents duplicate ratings. We will add an index on the track ID and rating, so a track's
+    # ratings can be counted from the index alone.
+    __table_args__ = (
+        Index(
+            "ix_track_rating_track_id_rating", "track_id", "rating",),)
     
     def __repr__(self):
         return f"TrackRating<{self.user},{self.track},r={self.rating}>"
@@ -1609,7 +1679,7 @@ class User(UserMixin, db.Model, HasUUIDMixin):
         cascade = "all, delete")
     # The User's ongoing race, if any. This is a view only relationship.
     ongoing_race_: Mapped[TrackUserRace] = relationship(
-        primaryjoin = and_(TrackUserRace.user_id == id, TrackUserRace.is_ongoing == True),
+        primaryjoin = and_(TrackUserRace.user_id == id, TrackUserRace.is_ongoing),
         uselist = False,
         viewonly = True)
     # This User's location history, as a dynamic relationship. Unordered.
@@ -1721,8 +1791,13 @@ class User(UserMixin, db.Model, HasUUIDMixin):
 
     @property
     def ongoing_race(self):
-        """Return the currently ongoing race instance for this User, or None."""
-        return self.ongoing_race_
+        """Return the currently ongoing race instance for this User, or None. The ongoing race relationship is kept current in memory by TrackUserRace as races are
+        started, finished, disqualified and cancelled; though a race loaded here that has since been concluded elsewhere (such as in bulk) will not be returned."""
+        ongoing_race = self.ongoing_race_
+        # If the loaded race is no longer ongoing, return None.
+        if ongoing_race and not ongoing_race.is_ongoing:
+            return None
+        return ongoing_race
     
     @property
     def has_player(self):
@@ -1739,6 +1814,10 @@ class User(UserMixin, db.Model, HasUUIDMixin):
         """Adds this location to the User's history."""
         self.location_history_.append(location)
 
+    def add_locations(self, locations):
+        """Adds all given locations to the User's history, in order."""
+        self.location_history_.extend(locations)
+
     def set_player(self, new_player):
         """Set the current Player for this User to the one given. This function will fail if a Player is already set, so be sure to call clear players
         everytime you wish to install a new one."""
@@ -1797,8 +1876,11 @@ class User(UserMixin, db.Model, HasUUIDMixin):
         raise NotImplementedError("update_password is not implemented correctly; password needs to be verified!")
 
     def set_password(self, new_password):
-        """Set this User's password to the given text."""
-        self.password = generate_password_hash(new_password)
+        """Set this User's password to the given text. The password will be hashed with the configured method, or the default if none configured."""
+        if config.PASSWORD_HASH_METHOD:
+            self.password = generate_password_hash(new_password, method = config.PASSWORD_HASH_METHOD)
+        else:
+            self.password = generate_password_hash(new_password)
 
     def check_password(self, password):
         """Check the given password against the hash stored in this User."""
@@ -11,8 +11,7 @@ import shapely
 from geoalchemy2 import shape
 
 from datetime import datetime, date
-from sqlalchemy import func, update, desc, asc
-from sqlalchemy.orm import with_expression
+from sqlalchemy import func, update, select, desc, asc
 from marshmallow import fields, Schema, post_load, EXCLUDE
 
 from . import db, config, models, tracks, vehicles, world, error
@@ -142,7 +141,7 @@ def races_query_for(user, **kwargs):
 
         # Build a query for track user race for that User where the track is finished.
         race_attempts_q = db.session.query(models.TrackUserRace)\
-            .filter(models.TrackUserRace.is_finished == True)\
+            .filter(models.TrackUserRace.is_finished)\
             .filter(models.TrackUserRace.user_id == user.id)
         # If track UID is given, apply that too.
         if track_uid:
@@ -168,9 +167,6 @@ def get_ongoing_race(user, **kwargs) -> models.TrackUserRace:
     -------
     An instance of TrackUserRace, can be None."""
     try:
-        # If current environment is testing, expire the given User.
-        if config.APP_ENV == "Test":
-            db.session.expire(user)
         # Return None if no race ongoing, otherwise the race.
         if not user.has_ongoing_race:
             return None
@@ -185,7 +181,7 @@ def get_race(**kwargs) -> models.TrackUserRace:
     Keyword arguments
     -----------------
     :race_uid: The Race's UID.
-    :must_be_finished: True if the race should be finished. None will be returned if it is now. True will also attach the finishing place. Default is False.
+    :must_be_finished: True if the race should be finished. None will be returned if it is now. Default is False.
     
     Returns
     -------
@@ -201,24 +197,90 @@ def get_race(**kwargs) -> models.TrackUserRace:
         # If race must be finished, filter on that.
         if must_be_finished:
             race_q = race_q\
-                .filter(models.TrackUserRace.is_finished == True)
+                .filter(models.TrackUserRace.is_finished)
         # Now, if race UID is given, attach it as a filter.
         if race_uid:
             race_q = race_q\
                 .filter(models.TrackUserRace.uid == race_uid)
-        # If must be finished, also attach finishing place.
-        if must_be_finished:
-            race_q = race_q\
-                .options(
-                    with_expression(models.TrackUserRace.finishing_place,
-                        func.row_number()
-                            .over(order_by = asc(models.TrackUserRace.stopwatch))))
         # Return the first result.
         return race_q.first()
     except Exception as e:
         raise e
 
 
+def get_races(race_uids, **kwargs):
+    """Locate each race identified by the given UIDs, with a single query. The races will be returned in the same order as the UIDs given; for any UID that does not
+    identify a race, None will be in its place.
+
+    Arguments
+    ---------
+    :race_uids: A list of race UIDs.
+
+    Keyword arguments
+    -----------------
+    :must_be_finished: True if the races should be finished. None will be in place of any that are not. Default is False.
+
+    Returns
+    -------
+    A list of TrackUserRace."""
+    try:
+        must_be_finished = kwargs.get("must_be_finished", False)
+        if not race_uids:
+            return []
+
+        # Construct a query for all races with any of the given UIDs.
+        races_q = db.session.query(models.TrackUserRace)\
+            .filter(models.TrackUserRace.uid.in_(race_uids))
+        # If races must be finished, filter on that.
+        if must_be_finished:
+            races_q = races_q\
+                .filter(models.TrackUserRace.is_finished)
+        # Map each race found to its UID, then return them in the order given.
+        races_by_uid = {race.uid: race for race in races_q.all()}
+        return [races_by_uid.get(race_uid, None) for race_uid in race_uids]
+    except Exception as e:
+        raise e
+
+
+def update_finishing_places_for(track, **kwargs):
+    """Recalculate and store the finishing place for every finished race on the given Track. Places are determined by ordering all finished races from fastest to slowest
+    stopwatch time. This should be called each time a race on the Track is finished, so the leaderboard can be read in order without recalculating places each time. If our
+    current environment is either LiveDevelopment or Production, race attempts that are flagged as fake will not be given a place. This function will not commit.
+
+    Arguments
+    ---------
+    :track: An instance of Track."""
+    try:
+        if config.APP_ENV == "Production" or config.APP_ENV == "LiveDevelopment":
+            filter_fake_attempts = True
+        else:
+            filter_fake_attempts = False
+        # Build a subquery for the UID of each finished race on this track, alongside that race's place on the leaderboard. As all these races are finished, each
+        # stopwatch time is simply finished less started; this can be read directly from the partial index on finished races.
+        finishing_places_q = select(models.TrackUserRace.uid, func.row_number().over(
+                order_by = asc(models.TrackUserRace.finished - models.TrackUserRace.started)).label("finishing_place"))\
+            .where(models.TrackUserRace.track_id == track.id)\
+            .where(models.TrackUserRace.is_finished)
+        # If filter fake attempts is True, require fake column to be False.
+        if filter_fake_attempts:
+            finishing_places_q = finishing_places_q\
+                .where(models.TrackUserRace.fake == False)
+        finishing_places_subq = finishing_places_q.subquery()
+        # Now, run an update statement on all finished races for this track, setting each race's finishing place to that in the subquery.
+        update_finishing_places_stmt = (
+            update(models.TrackUserRace)
+                .where(models.TrackUserRace.track_id == track.id)
+                .where(models.TrackUserRace.uid == finishing_places_subq.c.uid)
+                .values(finishing_place = finishing_places_subq.c.finishing_place)
+        )
+        # Execute this statement, synchronising the new finishing places to any races already in the session.
+        db.session.execute(update_finishing_places_stmt,
+            execution_options = dict(synchronize_session = "fetch"))
+        db.session.flush()
+    except Exception as e:
+        raise e
+
+
 def cancel_ongoing_races(reason = "server-problem", **kwargs):
     """This function will update all currently ongoing races to be in a cancelled state, with the given reason. Primarily, this should really only
     be used to cancel all ongoing races at the initialisation of the server. This function will not flush or commit. It returns nothing.
@@ -230,7 +292,7 @@ def cancel_ongoing_races(reason = "server-problem", **kwargs):
         # Run an update statement on all track user race instances, setting is cancelled to True.
         cancel_ongoing_races_stmt = (
             update(models.TrackUserRace)
-                .where(models.TrackUserRace.is_ongoing == True)
+                .where(models.TrackUserRace.is_ongoing)
                 .values(cancelled = True)
         )
         # Execute this statement.
@@ -419,6 +481,9 @@ def update_race_participation_for(user, player_update_result, **kwargs) -> Updat
         if verify_progress_result.is_finished:
             # The race has been finished successfully. We will now set the ongoing race's finished parameter to the time logged in latest Player update.
             ongoing_race.set_finished(verify_progress_result.time_finished)
+            db.session.flush()
+            # Recalculate the finishing places for all races on this track, now that this race has been finished.
+            update_finishing_places_for(ongoing_race.track)
             return UpdateRaceParticipationResult(ongoing_race)
         # Otherwise, race is not finished just yet, return a negative result.
         return UpdateRaceParticipationResult(ongoing_race)
@@ -482,9 +547,6 @@ def cancel_ongoing_race(user, **kwargs) -> CancelRaceResult:
             ongoing_race.cancel()
             # Flush transaction.
             db.session.flush()
-            if config.APP_ENV == "Test":
-                # If the environment is test, expire the User to reload from database.
-                db.session.expire(user)
         return CancelRaceResult(ongoing_race)
     except Exception as e:
         """TODO: we can catch exceptions here, then pass the relevant reason codes to second argument for cancel race result ctor; CancelRaceResult(race, <reason code>)"""
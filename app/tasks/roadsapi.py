@@ -7,6 +7,8 @@ import pyproj
 import shapely
 import logging
 
+from geoalchemy2 import shape
+from sqlalchemy import insert
 from marshmallow import Schema, fields, EXCLUDE, post_load
 
 from .. import db, config, models, tracks
@@ -189,6 +191,11 @@ class GoogleApiErrorSchema(Schema):
     @post_load
     def google_api_error_post_load(self, data, **kwargs) -> GoogleApiError:
         return GoogleApiError(**data)
+
+
+# Instances of both response schemas, constructed once at import, as a schema does not hold any state between loads.
+SNAP_TO_ROADS_RESPONSE_SCHEMA = SnapToRoadsResponseSchema()
+GOOGLE_API_ERROR_SCHEMA = GoogleApiErrorSchema()
     
 
 def _snap_to_roads_api_call(full_url):
@@ -255,12 +262,10 @@ def send_snap_to_roads_request(batch_idx, unsnapped_points, **kwargs) -> SnapToR
         # If status code is 200, this is a successful attempt! Return a deserialised snapped response.
         if status_code == 200:
             # Return a deserialised snapped response.
-            snap_to_roads_response_schema = SnapToRoadsResponseSchema()
-            return snap_to_roads_response_schema.load(response_d)
+            return SNAP_TO_ROADS_RESPONSE_SCHEMA.load(response_d)
         elif int(status_code / 100) == 4:
             # This request resulted in an API error. We will now raise a SnapToRoadsApiError exception.
-            google_api_error_schema = GoogleApiErrorSchema()
-            google_api_error = google_api_error_schema.load(response_d)
+            google_api_error = GOOGLE_API_ERROR_SCHEMA.load(response_d)
             LOG.warning(f"Attempting to request snapping batch #{batch_idx+1} to road failed due to an API error!")
             raise SnapToRoadsApiError(google_api_error)
         else:
@@ -289,8 +294,9 @@ def get_order(track_id, **kwargs) -> models.SnapToRoadOrder:
     
 
 def new_order(track, **kwargs) -> models.SnapToRoadOrder:
-    """Creates and returns a new snap to road order object with unsnapped and snapped geometries included. The object is returned but is not added to the
-    session so calling code should manage this. This function does not check to ensure the given track is not already verified before creating a new order.
+    """Creates and returns a new snap to road order object with unsnapped and snapped geometries included. The order is added to the session and flushed, so
+    that all unsnapped track points can be inserted in a single bulk insert, rather than as individual instances. This function does not check to ensure the given
+    track is not already verified before creating a new order.
     
     Arguments
     ---------
@@ -298,7 +304,7 @@ def new_order(track, **kwargs) -> models.SnapToRoadOrder:
     
     Returns
     -------
-    An instance of SnapToRoadOrder, not added to the session."""
+    An instance of SnapToRoadOrder, added to the session and flushed."""
     try:
         # Get the Track's entire path, as a linestring.
         track_path = track.path
@@ -314,21 +320,21 @@ def new_order(track, **kwargs) -> models.SnapToRoadOrder:
         unsnapped_track.set_crs(track_path.crs)
         snapped_track = models.SnapToRoadTrack()
         snapped_track.set_crs(track_path.crs)
-        # Populate the unsnapped track with all points in the line string above.
-        for point_idx, point_t in enumerate(linestring.coords):
-            # Construct a new Point.
-            point = shapely.geometry.Point(point_t)
-            # Now, construct a new track point. Set CRS to duplicate track path's CRS, and then set the actual point to that above.
-            track_point = models.SnapToRoadTrackPoint()
-            track_point.set_crs(track_path.crs)
-            track_point.set_position(point)
-            # Set the absolute index to the current coordinate's index.
-            track_point.set_absolute_idx(point_idx)
-            # Add this track point to the unsnapped track.
-            unsnapped_track.add_point(track_point)
         # Set both snap to road tracks on the order.
         new_order.set_snapped_track(snapped_track)
         new_order.set_unsnapped_track(unsnapped_track)
+        # Add the order to the session and flush, so both snap to road tracks are given their IDs.
+        db.session.add(new_order)
+        db.session.flush()
+        # Now, populate the unsnapped track with all points in the line string above. Build a row for each point, with its absolute index set to the current coordinate's
+        # index, and its CRS set to duplicate track path's CRS.
+        track_point_rows = [dict(
+            snap_to_road_track_id = unsnapped_track.id, absolute_idx = point_idx, crs = track_path.crs, point_geom = shape.from_shape(point, srid = track_path.crs))
+                for point_idx, point in enumerate(shapely.points(linestring.coords))]
+        # Insert all rows in a single bulk insert.
+        db.session.execute(insert(models.SnapToRoadTrackPoint.__table__), track_point_rows)
+        # Expire the unsnapped track's points, so they are loaded from the database when next accessed.
+        db.session.expire(unsnapped_track, ["track_points"])
         # Return the resulting object.
         return new_order
     except Exception as e:
@@ -337,14 +343,22 @@ def new_order(track, **kwargs) -> models.SnapToRoadOrder:
 
 def iter_unsnapped_batches(order, **kwargs):
     """Iterate the required times for remaining unsnapped batches, and on each iteration, yield both the current batch index, and the list of snap to road track
-    points that should be snapped. Keep repeating this until there are no more.
+    points that should be snapped. Keep repeating this until there are no more. All remaining unsnapped points are selected in a single query, up front; that is,
+    all points in the unsnapped track that do not yet have an equivalent (by absolute index) in the snapped track. The order must be flushed.
     
     Arguments
     ---------
     :order: An instance of SnapToRoadOrder, from which to iterate unsnapped batches."""
     try:
-        # Get the unsnapped track points as a list right now, since the unsnapped track itself will have points recursively removed.
-        all_unsnapped_track_points = order.unsnapped_track.track_points
+        # Make a subquery for the absolute indices of all points already in the snapped track.
+        snapped_absolute_idx_sq = db.session.query(models.SnapToRoadTrackPoint.absolute_idx)\
+            .filter(models.SnapToRoadTrackPoint.snap_to_road_track_id == order.snapped_track_id)
+        # Get the remaining unsnapped track points as a list right now, in ascending order of absolute index, since the unsnapped track itself will have points recursively removed.
+        all_unsnapped_track_points = db.session.query(models.SnapToRoadTrackPoint)\
+            .filter(models.SnapToRoadTrackPoint.snap_to_road_track_id == order.unsnapped_track_id)\
+            .filter(models.SnapToRoadTrackPoint.absolute_idx.not_in(snapped_absolute_idx_sq))\
+            .order_by(models.SnapToRoadTrackPoint.absolute_idx.asc())\
+            .all()
         batch_idx = 0
         # Now, iterate unsnapped batches as required.
         for current_point_idx in range(0, len(all_unsnapped_track_points), config.NUM_POINTS_PER_SNAP_BATCH):
@@ -477,9 +491,6 @@ def snap_to_road(track, **kwargs) -> SnapToRoadResult:
         if not order:
             LOG.debug(f"No snap-to-roads order exists for given track {track}, creating one now...")
             order = new_order(track)
-            # Remember to add to session, flush to persist.
-            db.session.add(order)
-            db.session.flush()
         else:
             LOG.debug(f"Continuing snap-to-roads for track {track}. We have snapped {order.percent_snapped}% to roads.")
         # Iterate to the number of batches to snap remaining for this order.
@@ -10,11 +10,10 @@ import shapely
 from geoalchemy2 import shape
 from flask_login import current_user
 from sqlalchemy import func, asc, desc, delete, and_
-from sqlalchemy.orm import with_expression
 from marshmallow import fields, Schema, post_load, EXCLUDE
 
 from .compat import insert
-from . import db, config, models, factory
+from . import db, config, models, compat, factory
 
 LOG = logging.getLogger("hawkspeed.tracks")
 LOG.setLevel( logging.DEBUG )
@@ -95,7 +94,7 @@ def tracks_query(**kwargs):
     
 
 def leaderboard_query_for(track, **kwargs):
-    """Return a query for the leaderboard from the given Track. The leaderboard is simply ordered from slowest stopwatch time to fasted stopwatch time. This function
+    """Return a query for the leaderboard from the given Track. The leaderboard is simply ordered by the finishing place stored on each race. This function
     will return the query object itself, which can be paginated or received in full. If our current environment is either LiveDevelopment or Production, this function
     will not return any race attempts that are flagged as fake. This can't be changed.
 
@@ -105,7 +104,8 @@ def leaderboard_query_for(track, **kwargs):
     
     Keyword arguments
     -----------------
-    :filter_: The filter to apply. If 'my' only current User's leaderboard items will be returned, otherwise if None or not recognised, no filter."""
+    :filter_: The filter to apply. If 'my' only current User's leaderboard items will be returned, otherwise if None or not recognised, no filter. Each race's finishing
+        place is its place on the track's overall leaderboard, so races returned with the 'my' filter will keep those places rather than being ranked from one."""
     try:
         filter_ = kwargs.get("filter_", None)
         
@@ -113,10 +113,9 @@ def leaderboard_query_for(track, **kwargs):
             filter_fake_attempts = True
         else:
             filter_fake_attempts = False
-        # Employ a query_expression / with_expression option on this query, to fill in the place in the leaderboard for each race outcome.
         # We will only include races that are confirmed finished in this query.
         leaderboard_q = db.session.query(models.TrackUserRace)\
-            .filter(models.TrackUserRace.is_finished == True)\
+            .filter(models.TrackUserRace.is_finished)\
             .filter(models.TrackUserRace.track_id == track.id)
         # If filter is equal t 'my', apply a filter for only current User's attempts.
         if filter_ == "my":
@@ -130,13 +129,9 @@ def leaderboard_query_for(track, **kwargs):
         if filter_fake_attempts:
             leaderboard_q = leaderboard_q\
                 .filter(models.TrackUserRace.fake == False)
-        # Attach order by and query expression for finishing place.
+        # Attach order by for finishing place, which is stored on each race as it is finished.
         leaderboard_q = leaderboard_q\
-            .order_by(asc(models.TrackUserRace.stopwatch))\
-            .options(
-                with_expression(models.TrackUserRace.finishing_place,
-                    func.row_number()
-                        .over(order_by = asc(models.TrackUserRace.stopwatch))))
+            .order_by(asc(models.TrackUserRace.finishing_place))
         return leaderboard_q
     except Exception as e:
         raise e
@@ -423,12 +418,13 @@ class LoadedTrackSegment():
 
     def get_linestring(self, transform_func):
         """Get this segment as a single Shapely LineString. This will expect all points involved are projected through EPSG 4326, and will transform these to the native
-        coordinate reference system as part of a new LineString."""
+        coordinate reference system as part of a new LineString. The transform function must accept sequences of longitudes and latitudes, such that all points are
+        transformed in a single call."""
         try:
-            # For all points in this segment, construct a Shapely Point, then from that list, construct a Shapely LineString. Expect this in EPSG:4326.
-            linestring_4326 = shapely.geometry.LineString([shapely.geometry.Point(pt.longitude, pt.latitude) for pt in self.points])
-            # Convert this linestring from 4326 to the designated coordinate reference system and return that.
-            return shapely.ops.transform(transform_func, linestring_4326)
+            # Gather the longitudes and latitudes of all points in this segment. Expect these in EPSG:4326.
+            longitudes, latitudes = zip(*[(pt.longitude, pt.latitude,) for pt in self.points])
+            # Transform all coordinates from 4326 to the designated coordinate reference system at once, then construct a Shapely LineString from the result.
+            return shapely.geometry.LineString(zip(*transform_func(longitudes, latitudes)))
         except Exception as e:
             raise e
 
@@ -661,34 +657,27 @@ def create_track_from_json(new_track_json, **kwargs) -> CreatedTrack:
         raise e
 
 
-def create_track_from_gpx(filename, **kwargs) -> CreatedTrack:
-    """Create a Track from a GPX file. Provide the filename, as well as a directory relative to the working directory. The GPX contents will be read
-    and parsed to produce a JSON object, which will then be used to produce a loaded track instance, which will then be passed to the create track
-    function. All tracks loaded with this function will be loaded as non-User tracks. This is a relatively secure function and as such, created tracks
-    will be entered as though they are verified and snapped to roads (by default.)
+class ReadGPXTrack():
+    """A container for a track read from a GPX file, but not yet created."""
+    def __init__(self, new_track_d, is_verified, is_snapped_to_roads, **kwargs):
+        self.new_track_d = new_track_d
+        self.is_verified = is_verified
+        self.is_snapped_to_roads = is_snapped_to_roads
+
+
+def read_track_from_gpx(gpx_absolute_path, **kwargs) -> ReadGPXTrack:
+    """Read and parse the GPX file at the given path, to produce a JSON object capable of being loaded as a track, alongside whether the file declares that
+    track verified and snapped to roads. This function will not create the track. As the result is identical for each read of the same file, it can be safely
+    reused to create the same track many times.
 
     Arguments
     ---------
-    :filename: The name (including extension) of the GPX file to create the new track from.
+    :gpx_absolute_path: The absolute path to the GPX file.
 
-    Keyword arguments
-    -----------------
-    :relative_dir: A directory relative to the working directory. By default, the configured GPX_ROUTES_DIR.
-    :is_verified: Whether this track is verified, that is, it does not need admin approval. Default is True, which will be AND'd with track.
-    :is_snapped_to_roads: Whether this track is snapped to roads. Default is True, which will be AND'd with track.
-    :intersection_check: Whether to run the track intersection check at all. Default is True.
-    
     Returns
     -------
-    An instance of CreatedTrack."""
+    An instance of ReadGPXTrack."""
     try:
-        relative_dir = kwargs.get("relative_dir", config.GPX_ROUTES_DIR)
-        is_verified = kwargs.get("is_verified", True)
-        is_snapped_to_roads = kwargs.get("is_snapped_to_roads", True)
-        intersection_check = kwargs.get("intersection_check", True)
-
-        # Assemble the absolute path.
-        gpx_absolute_path = os.path.join(os.getcwd(), relative_dir, filename)
         # If it does not exist, raise an error.
         if not os.path.isfile(gpx_absolute_path):
             """TODO: proper exception handling please."""
@@ -706,11 +695,8 @@ def create_track_from_gpx(filename, **kwargs) -> CreatedTrack:
             gpxtrack = gpxobj.tracks[0]
             # Convert all extensions to a dictionary.
             track_extensions = dict((ext.tag, ext,) for ext in gpxtrack.extensions)
-            # Get all applicable data points, supplemented with values given above.
+            # Get all applicable data points.
             track_type = int(track_extensions.get("type").text)
-            # Snapped to roads and verified are both required.
-            is_snapped_to_roads_= bool(int(track_extensions.get("snapped").text)) and is_snapped_to_roads
-            is_verified_ = bool(int(track_extensions.get("verified").text)) and is_verified
             # Now we can load a dictionary capable of being read by the loaded track schema.
             new_track_d = {
                 "name": gpxtrack.name,
@@ -721,9 +707,8 @@ def create_track_from_gpx(filename, **kwargs) -> CreatedTrack:
                         "longitude": track_point.longitude
                     } for track_point in segment.points
                 ]) for segment in gpxtrack.segments]}
-            # We'll now return the result of loading this JSON dictionary from JSON.
-            return create_track_from_json(new_track_d,
-                is_verified = is_verified_, is_snapped_to_roads = is_snapped_to_roads_, intersection_check = intersection_check)
+            return ReadGPXTrack(new_track_d,
+                bool(int(track_extensions.get("verified").text)), bool(int(track_extensions.get("snapped").text)))
         else:
             # This file needs conversion to hawkspeed authorship.
             raise NotImplementedError(f"GPX file with creator '{gpxobj.creator}' is not yet supported!")
@@ -731,6 +716,48 @@ def create_track_from_gpx(filename, **kwargs) -> CreatedTrack:
         raise e
 
 
+def create_track_from_gpx(filename, **kwargs) -> CreatedTrack:
+    """Create a Track from a GPX file. Provide the filename, as well as a directory relative to the working directory. The GPX contents will be read
+    and parsed to produce a JSON object, which will then be used to produce a loaded track instance, which will then be passed to the create track
+    function. All tracks loaded with this function will be loaded as non-User tracks. This is a relatively secure function and as such, created tracks
+    will be entered as though they are verified and snapped to roads (by default.)
+
+    Arguments
+    ---------
+    :filename: The name (including extension) of the GPX file to create the new track from.
+
+    Keyword arguments
+    -----------------
+    :relative_dir: A directory relative to the working directory. By default, the configured GPX_ROUTES_DIR.
+    :is_verified: Whether this track is verified, that is, it does not need admin approval. Default is True, which will be AND'd with track.
+    :is_snapped_to_roads: Whether this track is snapped to roads. Default is True, which will be AND'd with track.
+    :intersection_check: Whether to run the track intersection check at all. Default is True.
+    :read_gpx_track: A ReadGPXTrack previously read from this file. If given, the file will not be read again. Default is None.
+    
+    Returns
+    -------
+    An instance of CreatedTrack."""
+    try:
+        relative_dir = kwargs.get("relative_dir", config.GPX_ROUTES_DIR)
+        is_verified = kwargs.get("is_verified", True)
+        is_snapped_to_roads = kwargs.get("is_snapped_to_roads", True)
+        intersection_check = kwargs.get("intersection_check", True)
+        read_gpx_track = kwargs.get("read_gpx_track", None)
+
+        # If we have not been given the track already read, assemble the absolute path and read it now.
+        if not read_gpx_track:
+            gpx_absolute_path = os.path.join(os.getcwd(), relative_dir, filename)
+            read_gpx_track = read_track_from_gpx(gpx_absolute_path)
+        # Snapped to roads and verified are both required.
+        is_snapped_to_roads_ = read_gpx_track.is_snapped_to_roads and is_snapped_to_roads
+        is_verified_ = read_gpx_track.is_verified and is_verified
+        # We'll now return the result of loading this JSON dictionary from JSON.
+        return create_track_from_json(read_gpx_track.new_track_d,
+            is_verified = is_verified_, is_snapped_to_roads = is_snapped_to_roads_, intersection_check = intersection_check)
+    except Exception as e:
+        raise e
+
+
 def create_track(loaded_track, **kwargs) -> CreatedTrack:
     """Create a Track from the loaded track object. This function will check to see if an identical track already exists, and will fail if it does. Otherwise,
     a new Track will be created. Importantly, this function does not supply any validation functionality at all- this needs to be done in one of the abstract
@@ -835,12 +862,11 @@ def _ensure_track_no_interference(track_path, **kwargs):
     ---------
     :track_path: A fully populated TrackPath model."""
     try:
-        # Get the very first point in this track path, then buffer it by the configured value of NUM_METERS_MIN_FOR_NEW_TRACK_START.
-        start_point_buffered = track_path.start_point\
-            .buffer(config.NUM_METERS_MIN_FOR_NEW_TRACK_START, cap_style = shapely.geometry.CAP_STYLE.round)
-        # Now, perform a query for any Track whose point geometry is contained within the buffered start point.
+        # Get the very first point in this track path.
+        start_point = shape.from_shape(track_path.start_point, srid = config.WORLD_CONFIGURATION_CRS)
+        # Now, perform a query for any Track whose point geometry is within the configured value of NUM_METERS_MIN_FOR_NEW_TRACK_START of the start point.
         intersecting_tracks = db.session.query(models.Track)\
-            .filter(func.ST_Contains(shape.from_shape(start_point_buffered, srid = config.WORLD_CONFIGURATION_CRS), models.Track.point_geom))\
+            .filter(compat.st_dwithin(models.Track.point_geom, start_point, config.NUM_METERS_MIN_FOR_NEW_TRACK_START))\
             .all()
         # If there are any, fail for this reason.
         if len(intersecting_tracks) > 0:
@@ -69,22 +69,25 @@ def create_vehicle(request_create_vehicle, **kwargs) -> models.UserVehicle:
     Keyword arguments
     -----------------
     :user: Optionally provide a User to immediately add that vehicle to.
+    :vehicle_stock: Optionally provide the VehicleStock the request identifies, if already located; it will then not be located again.
 
     Returns
     -------
     The UserVehicle instance."""
     try:
         user = kwargs.get("user", None)
+        vehicle_stock = kwargs.get("vehicle_stock", None)
         
         # If the request has attribute 'text', ensure we're in test or development environments. Fail otherwise.
         if request_create_vehicle.text:
             # Fail if not in test or development.
             if config.APP_ENV != "Test" and config.APP_ENV != "Development":
                 raise Exception("RequestCreateVehicle's attribute, 'text', can't be used outside of debug modes.")
-            # Otherwise, locate the desired vehicle with text.
-            vehicle_stock = find_vehicle_stock(
-                text = request_create_vehicle.text)
-        else:
+            # Otherwise, locate the desired vehicle with text, unless it has already been located.
+            if not vehicle_stock:
+                vehicle_stock = find_vehicle_stock(
+                    text = request_create_vehicle.text)
+        elif not vehicle_stock:
             # Get the desired vehicle stock by its UID. Fail if none found.
             vehicle_stock = find_vehicle_stock(
                 vehicle_stock_uid = request_create_vehicle.vehicle_stock_uid)
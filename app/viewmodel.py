@@ -13,6 +13,7 @@ from functools import wraps
 from datetime import datetime
 from marshmallow import Schema, fields, EXCLUDE
 from sqlalchemy import asc, desc
+from sqlalchemy.orm import selectinload
 from flask_sqlalchemy import Pagination
 from werkzeug.local import LocalProxy
 
@@ -24,6 +25,25 @@ LOG.setLevel( logging.DEBUG )
 __view_models__ = {}
 
 
+def leaderboard_entry_load_options():
+    """Return the loader options for querying leaderboard entries. Each entry's User (and whether they are playing), and Vehicle through to its stock's make, model
+    and type, are all serialised; so these are loaded for all entries at once, rather than lazily for each entry.
+
+    Returns
+    -------
+    A tuple of loader options."""
+    return (
+        selectinload(models.TrackUserRace.user)
+            .selectinload(models.User.player_),
+        selectinload(models.TrackUserRace.vehicle)
+            .selectinload(models.UserVehicle.stock)
+            .selectinload(models.VehicleStock.year_model)
+            .options(
+                selectinload(models.VehicleYearModel.make),
+                selectinload(models.VehicleYearModel.model)
+                    .selectinload(models.VehicleModel.type)),)
+
+
 class SerialisablePagination(Pagination):
     """A custom pagination wrapper that allows the serialisation of an SQLAlchemy flask pagination object to be directly sent
     to a paged response type object."""
@@ -154,15 +174,19 @@ class ViewModelList():
 
     @property
     def items(self):
-        """Return a list of each internal item mapped to a typed view model with the given actor. If there are no items, an empty list is returned."""
+        """Return a list of each internal item mapped to a typed view model with the given actor. If there are no items, an empty list is returned. The view models
+        are only created upon first access, then reused by every access and serialisation thereafter."""
         if not self._items:
             return []
-        return [self._ViewModelCls(self._actor, self._transform_item(item), *self._extra_vm_args) for item in self._items]
+        if self._item_view_models == None:
+            self._item_view_models = [self._ViewModelCls(self._actor, self._transform_item(item), *self._extra_vm_args) for item in self._items]
+        return self._item_view_models
 
     def __init__(self, _items, _actor, _ViewModelCls, **kwargs):
         self._items = _items
         self._actor = _actor
         self._ViewModelCls = _ViewModelCls
+        self._item_view_models = None
 
         self._extra_vm_args = kwargs.get("extra_vm_args", [])
         self._transform_item = kwargs.get("transform_item", lambda item: item)
@@ -701,11 +725,13 @@ class TrackViewModel(BaseViewModel):
     
     @property
     def top_leaderboard(self) -> ViewModelList:
-        """Return a view model list of the top three entries in this track's leaderboard."""
-        top_leaderboard_entries = tracks.leaderboard_query_for(self.patient)\
-            .limit(3)\
-            .all()
-        return ViewModelList.make(top_leaderboard_entries, self.actor, LeaderboardEntryViewModel)
+        """Return a view model list of the top three entries in this track's leaderboard. If these entries were not given upon construction, they will be queried."""
+        if self._top_leaderboard_entries == None:
+            self._top_leaderboard_entries = tracks.leaderboard_query_for(self.patient)\
+                .options(*leaderboard_entry_load_options())\
+                .limit(3)\
+                .all()
+        return ViewModelList.make(self._top_leaderboard_entries, self.actor, LeaderboardEntryViewModel)
 
     @property
     def path(self) -> TrackPathViewModel:
@@ -791,6 +817,16 @@ class TrackViewModel(BaseViewModel):
         """Returns True if the actor can comment on this Track. The only requirement is that the actor has completed this track at least once."""
         return tracks.has_user_finished(self.patient, self.actor)
 
+    def __init__(self, _actor, _track, **kwargs):
+        """A normal view model constructor with an actor and a patient, where the patient is a Track.
+
+        Keyword arguments
+        -----------------
+        :top_leaderboard_entries: Optionally, the top three entries in this track's leaderboard, if the caller has already queried them. Otherwise, these will be
+        queried when the top leaderboard is first required."""
+        self._top_leaderboard_entries = kwargs.pop("top_leaderboard_entries", None)
+        super().__init__(_actor, _track, **kwargs)
+
     def serialise(self, **kwargs):
         """Serialise and return a TrackViewSchema representing the view relationship between the actor entity and the patient Track.
 
@@ -880,7 +916,8 @@ class TrackViewModel(BaseViewModel):
 
             # Build a leaderboard query.
             leaderboard_q = tracks.leaderboard_query_for(self.patient,
-                filter_ = filter_)
+                filter_ = filter_)\
+                .options(*leaderboard_entry_load_options())
             # Return a view model pagination list for this query.
             return ViewModelPagination.make(
                 leaderboard_q.paginate(
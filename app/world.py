@@ -1,5 +1,6 @@
 """A module for handling world operations."""
 import logging
+import functools
 import random
 import hashlib
 
@@ -13,7 +14,7 @@ from sqlalchemy import func, desc
 from datetime import datetime, date
 from marshmallow import fields, Schema, post_load, EXCLUDE
 
-from . import db, error, config, models, draw
+from . import db, error, config, models, compat, draw
 
 LOG = logging.getLogger("hawkspeed.world")
 LOG.setLevel( logging.DEBUG )
@@ -297,12 +298,10 @@ def collect_nearby_objects(user, user_location, **kwargs) -> WorldObjectUpdateRe
     -------
     A WorldObjectUpdateResult, which is a summary report of those objects."""
     try:
-        # Use the point set on the given User location, and buffer that by the proximity configured in settings.
-        proximity_polygon = user_location.point.buffer(config.NUM_METERS_PLAYER_PROXIMITY,
-            cap_style = shapely.geometry.CAP_STYLE.round)
-        # With the proximity polygon, we can perform a request for all world objects in that geometry.
+        # Use the point set on the given User location, and perform a request for all world objects within the proximity configured in settings of that point.
+        location_point = shape.from_shape(user_location.point, srid = config.WORLD_CONFIGURATION_CRS)
         tracks_in_proximity = db.session.query(models.Track)\
-            .filter(func.ST_Contains(shape.from_shape(proximity_polygon, srid = config.WORLD_CONFIGURATION_CRS), models.Track.point_geom))\
+            .filter(compat.st_dwithin(models.Track.point_geom, location_point, config.NUM_METERS_PLAYER_PROXIMITY))\
             .all()
         # Create a world object update result and return it.
         return WorldObjectUpdateResult(tracks_in_proximity)
@@ -487,8 +486,8 @@ def _prepare_user_location(request_player_update, **kwargs) -> models.UserLocati
         location_pt = shapely.geometry.Point(request_player_update.longitude, request_player_update.latitude)
         # Ensure we are able to support this location.
         _ensure_location_supported(location_pt)
-        # Now, we will transform this location point to the localised CRS.
-        location_pt = shapely.ops.transform(transformer.transform, location_pt)
+        # Now, we will transform this location point to the localised CRS. Transform the coordinates directly, and build the Point from the result.
+        location_pt = shapely.geometry.Point(transformer.transform(request_player_update.longitude, request_player_update.latitude))
         # With that done, instantiate a new user location and set basic information.
         user_location = models.UserLocation(
             longitude = request_player_update.longitude, latitude = request_player_update.latitude, logged_at = request_player_update.logged_at, bearing = request_player_update.bearing, speed = request_player_update.speed)
@@ -516,6 +515,26 @@ def prepare_user_location(request_player_update, **kwargs) -> models.UserLocatio
         raise e
     
 
+@functools.lru_cache(maxsize = None)
+def _get_supported_bounds_polygon(crs) -> shapely.geometry.Polygon:
+    """Construct and return a Shapely Polygon from the bounds of the given CRS' area of use. The Polygon will be prepared, since it will be tested against every
+    incoming location. As constructing a CRS is expensive, the result is cached for each CRS.
+
+    Arguments
+    ---------
+    :crs: The CRS whose area of use should be returned.
+
+    Returns
+    -------
+    A prepared Polygon, in geodetic coordinates."""
+    # Get the CRS' area of use, and from that, its bounds.
+    crs_bounds = pyproj.CRS(crs).area_of_use.bounds
+    # Now, construct a shapely Polygon from the bounds, and prepare it.
+    bounds_polygon = shapely.geometry.box(*crs_bounds)
+    shapely.prepare(bounds_polygon)
+    return bounds_polygon
+
+
 def _ensure_location_supported(point, crs = 4326, **kwargs):
     """Ensure the location in the given Shapely Point (XY format only,) is supported by how this server has been configured. If this is not the case, the function will
     raise an error. Otherwise, it will succeed quietly."""
@@ -523,17 +542,11 @@ def _ensure_location_supported(point, crs = 4326, **kwargs):
         if crs != 4326:
             # Raise a PositionNotSupportedError, because input CRS must be 4326 for now.
             raise PositionNotSupportedError(point, crs, PositionNotSupportedError.CODE_BAD_CRS)
-        # CRS is the reference system in which Point is. The Point must be XY, by the way.
-        crs = pyproj.CRS(config.WORLD_CONFIGURATION_CRS)
-        # Get its area of use.
-        crs_area_of_use = crs.area_of_use
-        # Get its bounds.
-        crs_bounds = crs_area_of_use.bounds
-        # Now, construct a shapely Polygon from the bounds, and ensure the given point lands within it.
-        bounds_polygon = shapely.geometry.box(*crs_bounds)
+        # Get the polygon bounding the area of use for the configured CRS, and ensure the given point lands within it. The Point must be XY, by the way.
+        bounds_polygon = _get_supported_bounds_polygon(config.WORLD_CONFIGURATION_CRS)
         if not bounds_polygon.contains(point):
             # Raise a PositionNotSupportedError because the given point falls outside our supported CRS.
-            raise PositionNotSupportedError(point, crs, PositionNotSupportedError.CODE_OUTSIDE_CRS)
+            raise PositionNotSupportedError(point, pyproj.CRS(config.WORLD_CONFIGURATION_CRS), PositionNotSupportedError.CODE_OUTSIDE_CRS)
     except Exception as e:
         raise e
 
@@ -8,6 +8,8 @@ EXTERNAL_MEDIA_BASE_PATH=""
 export APP_ENV=Production
 # Build the basics of this app.
 pipenv run flask init-db
+# Add the finishing place column to an existing database if required, and ensure every finished race has a finishing place.
+pipenv run flask update-finishing-places
 # Import all basic race tracks.
 pipenv run flask import-gpx-routes
 # Finally, run the server via gunicorn, using our wsgi entry point and gunicorn config.
@@ -8,6 +8,7 @@ import time
 import flask_socketio
 
 from flask import current_app
+from sqlalchemy import inspect, text
 from sqlalchemy_utils import create_database, database_exists
 
 from app import create_app, db, config, models, decorators, error, factory, tracks, vehicles, races
@@ -57,6 +58,32 @@ def repair_stuck_races(server_configuration, **kwargs):
     db.session.commit()
 
 
+@application.cli.command("update-finishing-places", help = "Adds the finishing place column if required, then recalculates the finishing place of every finished race, on every track.")
+def update_finishing_places():
+    """Races finished before finishing places were stored will have no finishing place; these can't be ordered or serialised in leaderboards. Databases created before
+    then will not even have the column, and init-db will not add it to an existing table; so the column and its index are first added if they do not exist. This is safe
+    to call at any time."""
+    track_user_race_table = models.TrackUserRace.__table__
+    inspector = inspect(db.engine)
+    # If the finishing place column does not exist, add it.
+    if "finishing_place" not in {column["name"] for column in inspector.get_columns(track_user_race_table.name)}:
+        LOG.debug(f"Adding the finishing place column to {track_user_race_table.name}")
+        finishing_place_column = track_user_race_table.c.finishing_place
+        db.session.execute(text(f"ALTER TABLE {track_user_race_table.name} ADD COLUMN {finishing_place_column.name} {finishing_place_column.type.compile(dialect = db.engine.dialect)}"))
+    # If the index on track ID and finishing place does not exist, create it.
+    if "ix_track_user_race_track_id_finishing_place" not in {index["name"] for index in inspector.get_indexes(track_user_race_table.name)}:
+        LOG.debug(f"Creating the finishing place index on {track_user_race_table.name}")
+        finishing_place_index = next(index for index in track_user_race_table.indexes if index.name == "ix_track_user_race_track_id_finishing_place")
+        finishing_place_index.create(db.session.connection())
+    all_tracks = db.session.query(models.Track)\
+        .all()
+    for track in all_tracks:
+        LOG.debug(f"Updating finishing places for all races on {track}")
+        races.update_finishing_places_for(track)
+    # Commit.
+    db.session.commit()
+
+
 @application.cli.command("import-gpx-routes", help = "Imports all routes stored in the GPX routes directory.")
 @decorators.get_server_configuration()
 def import_gpx_routes(server_configuration, **kwargs):
@@ -176,6 +203,9 @@ def add_fake_race_attempt(track_uid, username, started, finished):
     track_user_race.set_vehicle(user.vehicles.first())
     track_user_race.set_track_and_user(track, user)
     db.session.add(track_user_race)
+    db.session.flush()
+    # Recalculate the finishing places for all races on this track.
+    races.update_finishing_places_for(track)
     db.session.commit()
     LOG.debug(f"Added fake race attempt for {user}; {track_user_race}")
 
@@ -3,3 +3,5 @@
 export APP_ENV=Test
 # Run tests.
 pipenv run python test.py
+# Alternatively, run the tests in parallel with pytest-xdist, keeping each xdist_group on a single worker. Slow tests can be skipped with -m "not slow".
+#pipenv run python -m pytest -n auto --dist loadgroup unittests
@@ -1,41 +1,140 @@
 import os
 import time
 import uuid
-import gpxpy
+import pickle
+import hashlib
+import functools
+import contextlib
+import pytest
+import numpy as np
 import mimetypes
 import simplejson as json
+from lxml import etree
 from datetime import datetime, date
 
-from flask import g
+from flask import g, request
 from flask.testing import FlaskClient
-from flask_login import FlaskLoginClient
+from flask_login import FlaskLoginClient, login_user
 from flask_testing import TestCase
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from werkzeug.datastructures import FileStorage
 
-from app import create_app, db, models, config, factory, error, compat, world, races, tracks, vehicles
+from app import create_app, db, models, config, factory, error, world, races, tracks, vehicles
+
+# The name of this pytest-xdist worker (such as 'gw0') if tests are being run in parallel, otherwise None.
+XDIST_WORKER = os.environ.get("PYTEST_XDIST_WORKER", None)
+
+
+def make_worker_database_uri(database_uri):
+    """Return the database URI that should be used by this pytest-xdist worker, such that parallel workers never share a database. In-memory databases are already
+    private to each worker, so are returned as-is, as are all URIs when tests are not being run in parallel. Otherwise, the worker's name is appended to the name
+    of the database; for a server database, each worker's database must already exist.
+
+    Arguments
+    ---------
+    :database_uri: The configured database URI.
+
+    Returns
+    -------
+    The database URI for this worker."""
+    url = make_url(database_uri)
+    if not XDIST_WORKER or not url.database or url.database == ":memory:":
+        return database_uri
+    # For file databases, append the worker's name prior to the extension.
+    database_name, extension = os.path.splitext(url.database) if url.get_backend_name() == "sqlite" else (url.database, "",)
+    return url.set(database = f"{database_name}_{XDIST_WORKER}{extension}").render_as_string(hide_password = False)
+
+
+# The database URI configured for this environment, which will be used by all tests. When run in parallel, each worker uses its own database.
+_CONFIGURED_DATABASE_URI = make_worker_database_uri(config.SQLALCHEMY_DATABASE_URI)
+# When run in parallel, each worker must also store media in its own directories, since all media is deleted upon tear down of each case.
+if XDIST_WORKER:
+    config.EXTERNAL_MEDIA_BASE_PATH = os.path.join(config.EXTERNAL_MEDIA_BASE_PATH, XDIST_WORKER)
+    config.INSTANCE_TEMPORARY_MEDIA_PATH = os.path.join(config.INSTANCE_TEMPORARY_MEDIA_PATH, XDIST_WORKER)
+    os.makedirs(config.EXTERNAL_MEDIA_BASE_PATH, exist_ok = True)
+    os.makedirs(config.INSTANCE_TEMPORARY_MEDIA_PATH, exist_ok = True)
+# The absolute path to the directory containing all GPX files used to simulate races.
+RACES_DIR = os.path.join(os.getcwd(), config.IMPORTS_PATH, "races")
+# The directory in which each GPX file's parsed track will be pickled, so it need only be parsed once across all test runs.
+GPX_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+# A fingerprint of the tracks module, which both reads each GPX file and defines the read result. This is part of each pickled track's filename, so any change to how
+# tracks are read will cause every GPX file to be read again, rather than serving a stale result.
+with open(tracks.__file__, "rb") as f:
+    GPX_READER_FINGERPRINT = hashlib.sha1(f.read()).hexdigest()[:16]
+
+
+def pytest_configure(config):
+    """Register all custom markers used throughout the test suite."""
+    config.addinivalue_line("markers", "xdist_group(name): when run in parallel with pytest-xdist and --dist loadgroup, all tests in the same group will be run by the same worker.")
+    config.addinivalue_line("markers", "slow: the test simulates an entire race, and is among the slowest in the suite. Each is placed in its own xdist_group, so in parallel runs they are spread across workers.")
+
+
+def enable_sqlite_savepoints(engine):
+    """Disable the pysqlite driver's own transaction handling, and instead emit BEGIN ourselves whenever the engine begins a transaction. This is required
+    for SAVEPOINT to function correctly on SQLite, as per the SQLAlchemy documentation for the pysqlite dialect."""
+    @event.listens_for(engine, "connect")
+    def disable_pysqlite_transactions(dbapi_conn, connection_record):
+        dbapi_conn.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+
+class TransactionalSession(Session):
+    """A session that will always use the connection it has been bound to, instead of selecting an engine by bind key. This allows an entire test to be run
+    within a single outer transaction, which is simply rolled back on tear down."""
+    def get_bind(self, *args, **kwargs):
+        return self.bind
 
 
 class BaseCase(TestCase):
+    # The GPX filenames for all tracks that should be created just once, and then shared by all tests in this case. Retrieve these with get_shared_track.
+    shared_tracks = ()
+    # The arguments for all Users that should be created just once, and then shared by all tests in this case; each a dictionary of arguments for factory.create_user.
+    # Retrieve these with get_shared_user.
+    shared_users = ()
+
+    @classmethod
+    def setUpClass(cls):
+        """Start a new cache of test applications for this test case. An application (and thus its engine and database) will be created just once per database URI,
+        and will then be reused by all tests in the case. Also start a new cache of the UIDs for all shared tracks created, per database URI; this also records in which
+        databases the shared data has been created."""
+        cls._test_apps = dict()
+        cls._shared_track_uids = dict()
+
     @classmethod
     def tearDownClass(cls):
-        """Delete all test media items from the temp media and normal media directories."""
+        """Drop all tables from each database created for this test case, then delete all test media items from the temp media and normal media directories."""
+        for test_app in cls._test_apps.values():
+            with test_app.app_context():
+                db.drop_all()
+                db.engine.dispose()
+        cls._test_apps.clear()
+        cls._shared_track_uids.clear()
         target_directories = [config.EXTERNAL_MEDIA_BASE_PATH, config.INSTANCE_TEMPORARY_MEDIA_PATH]
         for target_directory in target_directories:
             target_files = os.listdir(target_directory)
             for filename in target_files:
                 file_to_delete = os.path.join(target_directory, filename)
-                # Delete the file.
-                os.remove(file_to_delete)
+                # Delete the file; skipping any directories, such as those belonging to parallel workers.
+                if os.path.isfile(file_to_delete):
+                    os.remove(file_to_delete)
 
     def setUp(self):
-        db.create_all()
+        # Open a connection and begin the outer transaction, within which this entire test will be run.
+        self._connection = db.engine.connect()
+        # Before beginning the outer transaction, ensure all data shared by this case has been created and committed.
+        self._create_shared_data()
+        self._transaction = self._connection.begin()
+        # Replace the session with one bound to this connection. Any commits performed by the code being tested will then only release a savepoint.
+        self._original_session = db.session
+        db.session = db._make_scoped_session(dict(config.SQLALCHEMY_SESSION_OPTS,
+            bind = self._connection, class_ = TransactionalSession, join_transaction_mode = "create_savepoint"))
         self.used_test_names = []
         self.mocked_file_uploads = []
-        try:
-            models.ServerConfiguration.get()
-        except error.NoServerConfigurationError as nse:
-            models.ServerConfiguration.new()
-        db.session.flush()
 
     def tearDown(self):
         # Clear test names.
@@ -46,20 +145,109 @@ class BaseCase(TestCase):
             g.timestamp_now = None
         if "datetime_now" in g:
             g.datetime_now = None
+        # Remove the session, then roll back the outer transaction; this will discard everything done by the test. Finally, restore the original session.
         db.session.remove()
-        db.drop_all()
+        self._transaction.rollback()
+        self._connection.close()
+        db.session = self._original_session
         # Destroy all mocked files.
         for mocked in self.mocked_file_uploads:
             mocked.close()
 
     def create_app(self):
+        database_uri = _CONFIGURED_DATABASE_URI
+        # If we've already created an application for this database, reuse it.
+        if database_uri in self._test_apps:
+            return self._test_apps[database_uri]
+        config.SQLALCHEMY_DATABASE_URI = database_uri
         test_app = create_app()
         with test_app.app_context():
-            # If PostGIS enabled and dialect is SQLite, we require SpatiaLite.
+            # If dialect is SQLite, we must enable savepoints. SpatiaLite has already been loaded upon each connection by create_app.
             if db.engine.dialect.name == "sqlite":
-                compat.should_load_spatialite_sync(db.engine)
+                enable_sqlite_savepoints(db.engine)
+            # Create all tables, just once for this application.
+            db.create_all()
+        self._test_apps[database_uri] = test_app
         return test_app
 
+    def _create_shared_data(self):
+        """Create and commit all data shared by the tests in this case, if it has not yet been created in the current database. This data is created outside of the
+        outer transaction, and so will survive the rollback at the end of each test; it is only destroyed when all tables are dropped upon tear down of the case."""
+        database_uri = str(db.engine.url)
+        if database_uri in self._shared_track_uids:
+            return
+        # Temporarily replace the session with one bound to this connection, outside of any transaction.
+        original_session = db.session
+        db.session = db._make_scoped_session(dict(config.SQLALCHEMY_SESSION_OPTS,
+            bind = self._connection, class_ = TransactionalSession))
+        try:
+            self.create_shared_data()
+            db.session.flush()
+            # Create each User given by shared_users.
+            for shared_user_d in self.shared_users:
+                factory.create_user(**shared_user_d)
+            db.session.flush()
+            # Create each track named by shared_tracks.
+            shared_track_uids = dict()
+            for filename in self.shared_tracks:
+                created_track = tracks.create_track_from_gpx(filename,
+                    read_gpx_track = read_cached_track_from_gpx(os.path.join(os.getcwd(), config.GPX_ROUTES_DIR, filename)))
+                db.session.flush()
+                shared_track_uids[filename] = created_track.track.uid
+            # Commit all shared data, then save the track UIDs for this database.
+            db.session.commit()
+            self._shared_track_uids[database_uri] = shared_track_uids
+        finally:
+            db.session.remove()
+            db.session = original_session
+
+    def create_shared_data(self):
+        """Create the data shared by all tests in this case. Subclasses that override this must call super first. By default, this creates the server configuration."""
+        try:
+            models.ServerConfiguration.get()
+        except error.NoServerConfigurationError as nse:
+            models.ServerConfiguration.new()
+
+    def get_shared_track(self, filename):
+        """Return the shared track created from the given GPX filename, attached to the current session. The filename must be given in shared_tracks."""
+        shared_track_uid = self._shared_track_uids[str(db.engine.url)][filename]
+        return db.session.query(models.Track)\
+            .filter(models.Track.uid == shared_track_uid)\
+            .first()
+
+    def get_shared_user(self, email_address):
+        """Return the shared User created with the given email address, attached to the current session. The User must be given in shared_users."""
+        return db.session.query(models.User)\
+            .filter(models.User.email_address == email_address)\
+            .first()
+
+    @contextlib.contextmanager
+    def assert_no_relationship_loads(self):
+        """A context manager that will fail the test if any relationship is loaded from the database within its block; for example, by lazily loading a User's
+        ongoing race. Use this to ensure the code in the block only reads relationships that have already been loaded or set."""
+        relationship_loads = []
+        def record_relationship_load(orm_execute_state):
+            if orm_execute_state.is_relationship_load:
+                relationship_loads.append(str(orm_execute_state.statement))
+        session = db.session()
+        event.listen(session, "do_orm_execute", record_relationship_load)
+        try:
+            yield
+        finally:
+            event.remove(session, "do_orm_execute", record_relationship_load)
+        self.assertEqual(relationship_loads, [], "Relationships were unexpectedly loaded from the database.")
+
+    @contextlib.contextmanager
+    def socket_handler_context(self, user, sid):
+        """A context manager that pushes a request context within which namespace handlers can be called directly, as though the given User had emitted the event
+        from a socket with the given SID. This skips the SocketIO test client, and its handshake, entirely. The User should already have a Player on this SID."""
+        with self.app.test_request_context():
+            # Log the User in, so they are returned by current_user, then set the SID that Flask-SocketIO would usually set upon the request.
+            login_user(user,
+                force = True)
+            request.sid = sid
+            yield
+
     def get_random_identity(self):
         return factory.get_random_identity()
 
@@ -123,9 +311,17 @@ class BaseCase(TestCase):
         db.session.flush()
         return user, new_player
 
+    def import_track_from_gpx(self, filename, **kwargs):
+        """Import a track using the tracks module, given the filename and keyword arguments, and return the CreatedTrack. The GPX file will only be read and parsed
+        the first time it is imported throughout all tests."""
+        gpx_absolute_path = os.path.join(os.getcwd(), kwargs.get("relative_dir", config.GPX_ROUTES_DIR), filename)
+        return tracks.create_track_from_gpx(filename,
+            read_gpx_track = read_cached_track_from_gpx(gpx_absolute_path), **kwargs)
+
     def create_track_from_gpx(self, user, filename, **kwargs):
-        """Import an a track using the tracks module, given the filename and keyword arguments, and set its ownership to the User given."""
-        created_track = tracks.create_track_from_gpx(filename, **kwargs)
+        """Import an a track using the tracks module, given the filename and keyword arguments, and set its ownership to the User given. The GPX file will only
+        be read and parsed the first time it is imported throughout all tests."""
+        created_track = self.import_track_from_gpx(filename, **kwargs)
         # Set owner.
         created_track.set_owner(user)
         db.session.flush()
@@ -145,6 +341,22 @@ class BaseCase(TestCase):
         db.session.flush()
         return track_user_race
     
+    def make_track_user_races(self, track, users, started, **kwargs):
+        """Create a new ongoing race on the given track for each of the given Users, all started at the same time. All races are added to the session together,
+        and flushed just once; so they will be inserted in a single batch."""
+        track_user_races = []
+        for user in users:
+            # Create the new instance with started set, then set vehicle, track and User.
+            track_user_race = models.TrackUserRace(
+                started = started)
+            track_user_race.set_vehicle(user.vehicles.first())
+            track_user_race.set_track_and_user(track, user)
+            track_user_races.append(track_user_race)
+        # Add all to session and flush to get new UIDs.
+        db.session.add_all(track_user_races)
+        db.session.flush()
+        return track_user_races
+
     def make_finished_track_user_race(self, track, user, started, finished, **kwargs):
         """"""
         # Create the new instance with started set.
@@ -160,9 +372,36 @@ class BaseCase(TestCase):
         # Set this as finished.
         track_user_race.set_finished(finished)
         db.session.flush()
+        # Recalculate the finishing places for all races on this track.
+        races.update_finishing_places_for(track)
         return track_user_race
 
+    def make_finished_track_user_races(self, finished_races):
+        """Create a new finished race for each tuple of track, User, started and finished given. All races are added to the session together, and flushed just once;
+        so they will be inserted in a single batch. Finishing places are then recalculated just once for each track. Races are returned in the order given."""
+        track_user_races = []
+        for track, user, started, finished in finished_races:
+            # Create the new instance with started set, then set vehicle, track and User.
+            track_user_race = models.TrackUserRace(
+                started = started)
+            track_user_race.set_vehicle(user.vehicles.first())
+            track_user_race.set_track_and_user(track, user)
+            # Set this as finished.
+            track_user_race.set_finished(finished)
+            track_user_races.append(track_user_race)
+        # Add all to session and flush to get new UIDs.
+        db.session.add_all(track_user_races)
+        db.session.flush()
+        # Recalculate the finishing places for all races on each distinct track.
+        for track in {track_user_race.track for track_user_race in track_user_races}:
+            races.update_finishing_places_for(track)
+        return track_user_races
+
     def simulate_entire_race(self, user, track, gpx_absolute_path, **kwargs):
+        """Simulate the given User racing the given track, by way of the given GPX file. By default, each location is submitted as its own player update, as would be
+        done by the socket handler. Optionally, supply per_point as False to instead prepare all locations in the GPX at once and add them all to the User's history together, then
+        update race participation with each in turn; this skips parsing each player update individually."""
+        per_point = kwargs.pop("per_point", True)
         race_simulator = PlayerRaceGPXSimulator(user, gpx_absolute_path)
         race = race_simulator.new_race(track)
         db.session.add(race)
@@ -170,6 +409,24 @@ class BaseCase(TestCase):
         db.session.expire(user)
 
         request_player_update_schema = world.RequestPlayerUpdateSchema()
+        if not per_point:
+            # Load a request player update for every step in a single pass, prepare a user location for each, then add all to the User's history at once.
+            request_player_updates = request_player_update_schema.load(list(race_simulator.step(**kwargs)), many = True)
+            user_locations = [world.prepare_user_location(request_player_update) for request_player_update in request_player_updates]
+            user.add_locations(user_locations)
+            db.session.flush()
+            # Now, update race participation with each location in turn, until the race is no longer ongoing.
+            for user_location in user_locations:
+                races.update_race_participation_for(user, world.PlayerUpdateResult(user, user_location))
+                if not user.has_ongoing_race:
+                    break
+            db.session.flush()
+            # Now, expire User and Race.
+            db.session.expire(race)
+            db.session.expire(user)
+            # Ensure user has no ongoing race.
+            self.assertEqual(user.has_ongoing_race, False)
+            return race
         for user_location_d in race_simulator.step(**kwargs):
             # With the user location, we'll load a request player update.
             request_player_update = request_player_update_schema.load(user_location_d)
@@ -192,18 +449,36 @@ class BaseCase(TestCase):
 
 
 class BaseWithDataCase(BaseCase):
-    """A base test case for tests that require all data to be imported such as vehicle information."""
-    def setUp(self):
+    """A base test case for tests that require all data to be imported such as vehicle information. This data is shared by all tests in the case."""
+    def create_shared_data(self):
         # Must call super first to get a server configuration created.
-        super().setUp()
+        super().create_shared_data()
         # Simply load vehicle data from the vehicles JSON.
         vehicles.load_vehicle_data_from("vehicles.json")
         
 
+# The WSGI environ key under which a test client will pass the User it was created for.
+MOCK_LOGIN_USER_ENVIRON_KEY = "hawkspeed.mock_login_user"
+
+
+def load_mock_login_user():
+    """A before request function that, if the request was made by a test client created for a specific User, will log that User in directly. This means Flask-Login
+    will not load the User from the session, or apply session protection, for any of these requests. The session cookie is still set by the client,
+    so any socket connection made through the client will still be authenticated."""
+    mock_login_user = request.environ.get(MOCK_LOGIN_USER_ENVIRON_KEY, None)
+    if mock_login_user:
+        login_user(mock_login_user,
+            force = True)
+
+
 class UserAppClient(FlaskLoginClient):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.override_user_agent = None
+        # If this client was created for a User, pass that User along with every request.
+        user = kwargs.get("user", None)
+        if user:
+            self.environ_base[MOCK_LOGIN_USER_ENVIRON_KEY] = user
 
     def open(self, *args, **kwargs):
         headers = kwargs.setdefault("headers", {})
@@ -224,6 +499,9 @@ class BaseMockLoginCase(BaseWithDataCase):
     def create_app(self):
         test_app = super().create_app()
         test_app.test_client_class = UserAppClient
+        # As the application is reused by all tests in this case, only register the mock login before request function once.
+        if load_mock_login_user not in test_app.before_request_funcs.get(None, []):
+            test_app.before_request(load_mock_login_user)
         return test_app
 
 
@@ -350,6 +628,74 @@ class BaseBrowserCase(BaseWithDataCase):
         return test_app
 
 
+def read_cached_track_from_gpx(gpx_absolute_path):
+    """Read the track from the GPX file at the given path, just once throughout all tests, or until the file is next modified. The result is also pickled to disk,
+    so subsequent test runs need not parse the file at all; until either the file or the tracks module is modified. The result is never modified, so it can be shared
+    by every track created from that file."""
+    # Key the cache by the file's modification time too, so an edited GPX file is read again.
+    return _read_cached_track_from_gpx(gpx_absolute_path, os.path.getmtime(gpx_absolute_path))
+
+
+@functools.lru_cache(maxsize = None)
+def _read_cached_track_from_gpx(gpx_absolute_path, modified_time):
+    # If the GPX file has been pickled by the current tracks module since it was last modified, load that instead of parsing the file again.
+    cache_path = os.path.join(GPX_CACHE_DIR, f"{os.path.relpath(gpx_absolute_path).replace(os.sep, '_')}.{GPX_READER_FINGERPRINT}.pkl")
+    if os.path.isfile(cache_path) and os.path.getmtime(cache_path) >= modified_time:
+        with open(cache_path, "rb") as f:
+            return pickle.load(f)
+    read_gpx_track = tracks.read_track_from_gpx(gpx_absolute_path)
+    # Otherwise, pickle the read track. Write to a temporary file first then replace, so parallel workers never read a partially written file.
+    os.makedirs(GPX_CACHE_DIR, exist_ok = True)
+    temporary_cache_path = f"{cache_path}.{os.getpid()}"
+    with open(temporary_cache_path, "wb") as f:
+        pickle.dump(read_gpx_track, f)
+    os.replace(temporary_cache_path, cache_path)
+    return read_gpx_track
+
+
+def read_gpx_track_points(gpx_path):
+    """Stream all track points from the GPX file at the given path, directly into arrays of latitudes, longitudes and logged at timestamps (in milliseconds.) Each
+    element is cleared as soon as it has been read, so memory remains flat no matter the size of the file. Only a single track is supported.
+
+    Arguments
+    ---------
+    :gpx_path: The absolute path to the GPX file.
+
+    Returns
+    -------
+    A tuple of three NumPy arrays; the latitudes, longitudes and logged at timestamps of each point."""
+    latitudes, longitudes, times = [], [], []
+    num_tracks = 0
+    for _, element in etree.iterparse(gpx_path, tag = ("{*}trk", "{*}trkpt",)):
+        if etree.QName(element).localname == "trk":
+            num_tracks += 1
+            if num_tracks > 1:
+                raise Exception("No more than ONE race is allowed in PlayerRaceGPXSimulator!")
+        else:
+            latitudes.append(element.get("lat"))
+            longitudes.append(element.get("lon"))
+            # Get the time for this point, dropping any UTC designator since NumPy datetimes are always naive.
+            times.append(element.findtext("{*}time").rstrip("Z"))
+        element.clear()
+    return (np.array(latitudes, dtype = np.float64), np.array(longitudes, dtype = np.float64),
+        np.array(times, dtype = "datetime64[ms]").astype(np.int64).astype(np.float64),)
+
+
+def read_cached_gpx_track_points(gpx_path):
+    """Stream all track points from the GPX file at the given path into arrays, just once throughout all tests, or until the file is next modified. The arrays are
+    read-only, so they can be shared by every simulation of that file."""
+    # Key the cache by the file's modification time too, so an edited GPX file is read again.
+    return _read_cached_gpx_track_points(gpx_path, os.path.getmtime(gpx_path))
+
+
+@functools.lru_cache(maxsize = None)
+def _read_cached_gpx_track_points(gpx_path, modified_time):
+    track_points = read_gpx_track_points(gpx_path)
+    for track_point_array in track_points:
+        track_point_array.setflags(write = False)
+    return track_points
+
+
 class PlayerRaceGPXSimulator():
     """A class that, given a User and a GPX, the programmer can step through each point in the race as if it were being driven in real time."""
     @property
@@ -359,18 +705,13 @@ class PlayerRaceGPXSimulator():
     def __init__(self, _user, _race_gpx_path, **kwargs):
         self._race_gpx_path = _race_gpx_path
         self._user = _user
-        self._race_gpx = None
         # Now, we'll read the contents of this file. But first, ensure it exists.
         if not os.path.isfile(self._race_gpx_path):
             raise Exception(f"No such GPX file {self._race_gpx_path}!")
-        # Open the file and read its contents, parse as GPX.
-        with open(self._race_gpx_path, "r") as gpx_file:
-            self._race_gpx = gpxpy.parse(gpx_file)
-        # If multiple tracks, raise exception.
-        if len(self._race_gpx.tracks) > 1:
-            raise Exception("No more than ONE race is allowed in PlayerRaceGPXSimulator!")
+        # Stream the latitude, longitude and logged at (in milliseconds) of each point from the file into arrays, just once throughout all tests.
+        self._latitudes, self._longitudes, self._logged_ats = read_cached_gpx_track_points(self._race_gpx_path)
         # Get the start time.
-        self._started = (self._race_gpx.tracks[0].segments[0].points[0].time.timestamp()) * 1000
+        self._started = float(self._logged_ats[0])
 
     def new_race(self, _track):
         # Set the User, the Track and the time at which the race started; the first point in the given GPX.
@@ -382,19 +723,19 @@ class PlayerRaceGPXSimulator():
 
     def step(self, **kwargs):
         ms_adjustment = kwargs.get("ms_adjustment", 0)
-        # Step through each segment, and each point within each segment and produce a UserLocation instance.
-        # Yield that.
-        for segment in self._race_gpx.tracks[0].segments:
-            for point in segment.points:
-                yield dict(
-                    viewport_minx = 0,
-                    viewport_miny = 0,
-                    viewport_maxx = 0,
-                    viewport_maxy = 0,
-                    zoom = 0,
-                    latitude = point.latitude,
-                    longitude = point.longitude,
-                    logged_at = (point.time.timestamp() * 1000) + ms_adjustment,
-                    speed = 40,
-                    bearing = 180.0
-                )
+        # Apply the adjustment to all logged at timestamps at once.
+        logged_ats = self._logged_ats + ms_adjustment
+        # Step through each point and produce a dictionary representing a player update. Yield that.
+        for latitude, longitude, logged_at in zip(self._latitudes.tolist(), self._longitudes.tolist(), logged_ats.tolist()):
+            yield dict(
+                viewport_minx = 0,
+                viewport_miny = 0,
+                viewport_maxx = 0,
+                viewport_maxy = 0,
+                zoom = 0,
+                latitude = latitude,
+                longitude = longitude,
+                logged_at = logged_at,
+                speed = 40,
+                bearing = 180.0
+            )
@@ -1,10 +1,13 @@
 import os
+import unittest
 import time
 import json
 import base64
+import pytest
 
 from datetime import date, datetime, timedelta
 from flask import url_for
+from sqlalchemy import func, select
 from unittests.conftest import BaseAPICase
 
 from app import db, config, factory, models, login_manager, users, vehicles
@@ -319,9 +322,9 @@ class TestUserAPI(BaseAPICase):
             # Ensure there's 2 items in response.
             self.assertEqual(len(races_json), 2)
 
+    @unittest.skip("Not yet implemented.")
     def test_page_user_tracks(self):
         """"""
-        self.assertEqual(True, False)
         
 
 class TestVehicleAPI(BaseAPICase):
@@ -506,12 +509,14 @@ class TestTrackAPI(BaseAPICase):
             # Ensure there are more than 0 points in the response.
             self.assertNotEqual(len(track_with_path_json["track_path"]["points"]), 0)
 
+    @pytest.mark.xdist_group("db_writer_races")
     def test_page_race_leaderboard(self):
         """Import a test GPX route.
         Create 2 Users.
-        For User1 step through an entire race for the GPX route (successful attempt.)
-        For User2 step through the same race but at 500 ms slower at each step.
-        For User1 again, step through the same race but at 1000 ms slower at each step."""
+        For User1 create a finished race for the GPX route.
+        For User2 create a finished race on the same route, but 500 ms slower.
+        For User1 again, create a finished race on the same route, but 1000 ms slower.
+        The races are created directly, since only the leaderboard is being tested here; race simulation itself is tested by test_race_good_race."""
         # Create two new Users.
         aldos = factory.create_user("alden@mail.com", "password",
             username = "alden", vehicle = "1994 Toyota Supra")
@@ -520,21 +525,15 @@ class TestTrackAPI(BaseAPICase):
         # Create a track.
         track = self.create_track_from_gpx(aldos, "yarra_boulevard.gpx")
         db.session.flush()
-        # Now, for User1, step through the entire race yarra_boulevard_good_race_1.
-        self.simulate_entire_race(aldos, track, os.path.join(os.getcwd(), config.IMPORTS_PATH, "races", "yarra_boulevard_good_race_1.gpx"))
-        db.session.flush()
-        # Refresh aldos.
-        db.session.refresh(aldos)
-        # Now for User2, step through the same race, but at 500 ms slower.
-        self.simulate_entire_race(emily, track, os.path.join(os.getcwd(), config.IMPORTS_PATH, "races", "yarra_boulevard_good_race_1.gpx"),
-            ms_adjustment = 500)
-        db.session.flush()
-        # Now for User1 again, step through the same race, but at 1000ms slower.
-        self.simulate_entire_race(aldos, track, os.path.join(os.getcwd(), config.IMPORTS_PATH, "races", "yarra_boulevard_good_race_1.gpx"),
-            ms_adjustment = 1000)
-        db.session.flush()
+        time_started = time.time() * 1000
+        # Now, for User1, create a finished race that took 10 seconds.
+        self.make_finished_track_user_race(track, aldos, time_started, time_started + 10000)
+        # Now for User2, create a finished race that took 500 ms longer.
+        self.make_finished_track_user_race(track, emily, time_started, time_started + 10500)
+        # Now for User1 again, create a finished race that took 1000 ms longer.
+        self.make_finished_track_user_race(track, aldos, time_started, time_started + 11000)
         # Check there are 3 races logged in the database.
-        self.assertEqual(db.session.query(models.TrackUserRace).count(), 3)
+        self.assertEqual(db.session.scalar(select(func.count()).select_from(models.TrackUserRace)), 3)
         # Now login as aldos, and query the leaderboard for the track above.
         with self.app.test_client(user = aldos) as client:
             leaderboard_response = client.get(url_for("api.page_track_leaderboard", track_uid = track.uid))
@@ -569,6 +568,7 @@ class TestTrackAPI(BaseAPICase):
             self.assertEqual(track_json["top_leaderboard"][2]["player"]["uid"], aldos.uid)
             self.assertEqual(track_json["top_leaderboard"][2]["finishing_place"], 3)
 
+    @pytest.mark.xdist_group("db_writer_ratings")
     def test_track_rating(self):
         """Create a User and and import a test track.
         Authenticate as the User.
@@ -591,8 +591,7 @@ class TestTrackAPI(BaseAPICase):
             # Now, perform a request to upvote the track. Ensure response is 200, then get its JSON. Ensure our rating is now True, and the track has 1
             # positive and 0 negative votes.
             track_response = client.post(url_for("api.rate_track", track_uid = track.uid),
-                data = json.dumps(dict( rating = True )),
-                content_type = "application/json")
+                json = dict( rating = True ))
             self.assertEqual(track_response.status_code, 200)
             track_json = track_response.json
             # Ensure our rating is True, there is 1 like and 0 dislikes.
@@ -602,8 +601,7 @@ class TestTrackAPI(BaseAPICase):
             # Now, perform a request to downvote the track. Ensure response is 200, then get its JSON. Ensure our rating is now False, and the track has 0
             # positive and 1 negative votes.
             track_response = client.post(url_for("api.rate_track", track_uid = track.uid),
-                data = json.dumps(dict( rating = False )),
-                content_type = "application/json")
+                json = dict( rating = False ))
             self.assertEqual(track_response.status_code, 200)
             track_json = track_response.json
             # Ensure our rating is False, there is 0 likes and 1 dislike.
@@ -620,14 +618,14 @@ class TestTrackAPI(BaseAPICase):
             self.assertEqual(track_json["ratings"]["num_positive_votes"], 0)
             self.assertEqual(track_json["ratings"]["num_negative_votes"], 0)
     
+    @unittest.skip("Not yet implemented.")
     def test_track_comments(self):
         """Test the API functionality for creating, managing and paging track comments."""
-        self.assertEqual(True, False)
 
+    @unittest.skip("Not yet implemented.")
     def test_get_race(self):
         """"""
-        self.assertEqual(True, False)
 
+    @unittest.skip("Not yet implemented.")
     def test_get_race_leaderboard(self):
         """"""
-        self.assertEqual(True, False)
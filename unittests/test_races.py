@@ -2,18 +2,22 @@ import os
 import time
 import json
 import base64
+import pytest
 
 from shapely import geometry
 
-from sqlalchemy import func, asc
+from sqlalchemy import func, asc, select
 from datetime import date, datetime, timedelta
 from flask import url_for
-from unittests.conftest import BaseWithDataCase, PlayerRaceGPXSimulator
+from unittests.conftest import BaseWithDataCase, PlayerRaceGPXSimulator, RACES_DIR
 
 from app import db, config, factory, models, login_manager, world, tracks, races, draw, error
 
 
+@pytest.mark.xdist_group("db_writer_races")
 class TestRaces(BaseWithDataCase):
+    shared_tracks = ("yarra_boulevard.gpx",)
+
     def test_stopwatch(self):
         """Test both instance level and expression level for property stopwatch."""
         # Create a new User.
@@ -23,7 +27,6 @@ class TestRaces(BaseWithDataCase):
         vehicle = aldos.vehicles.first()
         # Create a track.
         track = self.create_track_from_gpx(aldos, "example1.gpx")
-        db.session.flush()
         time_now = time.time()
         # Create a new track user race for between this user and track.
         race = models.TrackUserRace(
@@ -66,7 +69,6 @@ class TestRaces(BaseWithDataCase):
         vehicle = aldos.vehicles.first()
         # Create a track.
         track = self.create_track_from_gpx(aldos, "example1.gpx")
-        db.session.flush()
         # Ensure aldos does not have an ongoing race.
         self.assertIsNone(aldos.ongoing_race)
         # Create a new track user race for between this user and track.
@@ -78,31 +80,29 @@ class TestRaces(BaseWithDataCase):
         race.set_crs(config.WORLD_CONFIGURATION_CRS)
         db.session.add(race)
         db.session.flush()
-        # Refresh aldos.
-        db.session.refresh(aldos)
-        # Ensure aldos now has an ongoing race.
-        self.assertIsNotNone(aldos.ongoing_race)
-        # Check that, via instance property, race is ongoing.
-        self.assertEqual(race.is_ongoing, True)
+        # Setting the track and User should have set the race as aldos' ongoing race, so neither of the following should load anything.
+        with self.assert_no_relationship_loads():
+            # Ensure aldos now has an ongoing race.
+            self.assertIsNotNone(aldos.ongoing_race)
+            # Check that, via instance property, race is ongoing.
+            self.assertEqual(race.is_ongoing, True)
         # Check that, via expression property, race is ongoing.
-        race_ = db.session.query(models.TrackUserRace)\
-            .filter(models.TrackUserRace.user_id == aldos.id)\
-            .filter(models.TrackUserRace.track_id == track.id)\
-            .filter(models.TrackUserRace.is_ongoing == True)\
-            .first()
-        self.assertIsNotNone(race_)
+        race_uid = db.session.scalar(select(models.TrackUserRace.uid)
+            .where(models.TrackUserRace.user_id == aldos.id)
+            .where(models.TrackUserRace.track_id == track.id)
+            .where(models.TrackUserRace.is_ongoing == True))
+        self.assertIsNotNone(race_uid)
         # Now, set the race finished.
         finished = (time.time()*1000)+20000
         race.set_finished(finished)
         db.session.flush()
         # Ensure it is no longer ongoing.
         self.assertEqual(race.is_ongoing, False)
-        race_ = db.session.query(models.TrackUserRace)\
-            .filter(models.TrackUserRace.user_id == aldos.id)\
-            .filter(models.TrackUserRace.track_id == track.id)\
-            .filter(models.TrackUserRace.is_ongoing == False)\
-            .first()
-        self.assertIsNotNone(race_)
+        race_uid = db.session.scalar(select(models.TrackUserRace.uid)
+            .where(models.TrackUserRace.user_id == aldos.id)
+            .where(models.TrackUserRace.track_id == track.id)
+            .where(models.TrackUserRace.is_ongoing == False))
+        self.assertIsNotNone(race_uid)
 
     def test_race_track_progress(self):
         # Create a new User.
@@ -112,7 +112,6 @@ class TestRaces(BaseWithDataCase):
         vehicle = aldos.vehicles.first()
         # Create a track.
         track = self.create_track_from_gpx(aldos, "example1.gpx")
-        db.session.flush()
         # Start a new race for this User and this track.
         # Create a new track user race for between this user and track.
         race = models.TrackUserRace(
@@ -133,61 +132,71 @@ class TestRaces(BaseWithDataCase):
             world.prepare_user_location(dict(latitude = -37.84354, longitude = 145.029053, logged_at = 1678508082000, speed = 70.0, bearing = 180.0))
         ]
         # Associate all with the User, so they are all granted a User ID.
-        for x in user_locations:
-            aldos.add_location(x)
+        aldos.add_locations(user_locations)
         db.session.flush()
         # Once we've prepared these locations, we'll add them to the race ongoing.
         race.add_location(user_locations[0])
-        db.session.flush()
         # Ensure there is still no progress.
         self.assertEqual(race.has_progress, False)
         race.add_location(user_locations[1])
-        db.session.flush()
         # Now, ensure we have progress.
         self.assertEqual(race.has_progress, True)
 
+    @pytest.mark.slow
+    @pytest.mark.xdist_group("test_race_track_bad_shortcut_1")
     def test_race_track_bad_shortcut_1(self):
         # Create a new User.
         aldos = factory.create_user("alden@mail.com", "password",
             username = "alden", vehicle = "1994 Toyota Supra")
         db.session.flush()
-        vehicle = aldos.vehicles.first()
-        # Create a track.
-        track = self.create_track_from_gpx(aldos, "yarra_boulevard.gpx")
-        db.session.flush()
+        # Get the shared track.
+        track = self.get_shared_track("yarra_boulevard.gpx")
         # Simulate a race where the Player takes an unauthorised shortcut.
-        race = self.simulate_entire_race(aldos, track, os.path.join(os.getcwd(), config.IMPORTS_PATH, "races", "yarra_boulevard_dq_bad_shortcut.gpx"))
-        db.session.flush()
+        race = self.simulate_entire_race(aldos, track, os.path.join(RACES_DIR, "yarra_boulevard_dq_bad_shortcut.gpx"))
         # Ensure thsi race has been disqualified.
         self.assertEqual(race.is_disqualified, True)
 
-    def test_race_track_bad_shortcut_2(self):
+    @pytest.mark.slow
+    @pytest.mark.xdist_group("test_race_track_bad_shortcut_bulk")
+    def test_race_track_bad_shortcut_bulk(self):
         # Create a new User.
         aldos = factory.create_user("alden@mail.com", "password",
             username = "alden", vehicle = "1994 Toyota Supra")
         db.session.flush()
-        vehicle = aldos.vehicles.first()
-        # Create a track.
-        track = self.create_track_from_gpx(aldos, "yarra_boulevard.gpx")
+        # Get the shared track.
+        track = self.get_shared_track("yarra_boulevard.gpx")
+        # Simulate a race where the Player takes an unauthorised shortcut, submitting all locations in bulk.
+        race = self.simulate_entire_race(aldos, track, os.path.join(RACES_DIR, "yarra_boulevard_dq_bad_shortcut.gpx"),
+            per_point = False)
+        # Ensure this race has been disqualified.
+        self.assertEqual(race.is_disqualified, True)
+
+    @pytest.mark.slow
+    @pytest.mark.xdist_group("test_race_track_bad_shortcut_2")
+    def test_race_track_bad_shortcut_2(self):
+        # Create a new User.
+        aldos = factory.create_user("alden@mail.com", "password",
+            username = "alden", vehicle = "1994 Toyota Supra")
         db.session.flush()
+        # Get the shared track.
+        track = self.get_shared_track("yarra_boulevard.gpx")
         # Simulate a race where the Player takes an unauthorised shortcut.
-        race = self.simulate_entire_race(aldos, track, os.path.join(os.getcwd(), config.IMPORTS_PATH, "races", "yarra_boulevard_dq_bad_shortcut_2_notdone.gpx"))
-        db.session.flush()
+        race = self.simulate_entire_race(aldos, track, os.path.join(RACES_DIR, "yarra_boulevard_dq_bad_shortcut_2_notdone.gpx"))
         # Ensure thsi race has been disqualified.
         self.assertEqual(race.is_disqualified, True)
 
+    @pytest.mark.slow
+    @pytest.mark.xdist_group("test_race_good_race")
     def test_race_good_race(self):
         # Create a new User.
         aldos = factory.create_user("alden@mail.com", "password",
             username = "alden", vehicle = "1994 Toyota Supra")
         db.session.flush()
-        vehicle = aldos.vehicles.first()
-        # Create a track.
-        track = self.create_track_from_gpx(aldos, "yarra_boulevard.gpx")
-        db.session.flush()
-        # Now, for User1, step through the entire race yarra_boulevard_good_race_1.
-        race = self.simulate_entire_race(aldos, track, os.path.join(os.getcwd(), config.IMPORTS_PATH, "races", "yarra_boulevard_good_race_1.gpx"))
-        db.session.flush()
+        # Get the shared track.
+        track = self.get_shared_track("yarra_boulevard.gpx")
+        # Now, for User1, submit the entire race yarra_boulevard_good_race_1 in bulk.
+        race = self.simulate_entire_race(aldos, track, os.path.join(RACES_DIR, "yarra_boulevard_good_race_1.gpx"),
+            per_point = False)
         # Ensure the race is now finished.
         self.assertEqual(race.is_finished, True)
     
@@ -197,13 +206,10 @@ class TestRaces(BaseWithDataCase):
         user1 = self.get_random_user()
         user2 = self.get_random_user()
         db.session.flush()
-        # Create a track.
-        track = self.create_track_from_gpx(user1, "yarra_boulevard.gpx")
-        db.session.flush()
-        # Now create a track instance for both user1 and user2 on this track.
-        user1_attempt = self.make_track_user_race(track, user1, time.time() * 1000)
-        user2_attempt = self.make_track_user_race(track, user2, time.time() * 1000)
-        db.session.flush()
+        # Get the shared track.
+        track = self.get_shared_track("yarra_boulevard.gpx")
+        # Now create a track instance for both user1 and user2 on this track, inserted together.
+        user1_attempt, user2_attempt = self.make_track_user_races(track, [user1, user2], time.time() * 1000)
         # Ensure both races are ongoing.
         self.assertEqual(user1_attempt.is_ongoing, True)
         self.assertEqual(user2_attempt.is_ongoing, True)
@@ -211,7 +217,6 @@ class TestRaces(BaseWithDataCase):
         self.assertEqual(db.session.query(models.TrackUserRace.uid).filter(models.TrackUserRace.is_ongoing == True).count(), 2)
         # Now, access the races module and cancel all ongoing races.
         races.cancel_ongoing_races()
-        db.session.flush()
         # Ensure both are no longer ongoing, and there are 0 ongoing races.
         self.assertEqual(user1_attempt.is_ongoing, False)
         self.assertEqual(user2_attempt.is_ongoing, False)
@@ -1,8 +1,8 @@
 import os
+import re
 import time
 import math
 import json
-import urllib.parse
 import base64
 
 from sqlalchemy import func
@@ -13,18 +13,19 @@ from app import db, config, models, factory, error
 from app.tasks import roadsapi
 
 
+# Matches the URL encoded value of the path argument in a snap to roads request.
+_PATH_ARGUMENT_RE = re.compile(r"[?&]path=([^&]*)")
+# Matches each URL encoded latitude & longitude pair in the path argument, separated by a comma.
+_PATH_COORDINATES_RE = re.compile(r"(-?[\d.]+)%2C(-?[\d.]+)")
+
+
 def _fake_snap_to_roads_api_call(full_url):
-        """For our fake api call, we'll simply process the incoming URL, parse the parameters, then return all the points provided as a Google response."""
-        # Parse the URL into a ParseResult.
-        parse_result = urllib.parse.urlparse(full_url)
-        # Now, parse qs on the query parameters of the result, to get a dictionary of all arguments decoded.
-        query_arguments = urllib.parse.parse_qs(parse_result.query)
-        # Now, get the path, which is a string, and split it by pipes. This is an array of coordinates joined by commas.
-        coordinates_l = query_arguments["path"][0].split("|")
-        # Split these coordinates by a comma each, and create dicts compatible with latitude longitude literals.
-        latitude_longitude_literals_l = [dict(latitude = pt[0], longitude = pt[1]) for pt in [ptx.split(",") for ptx in coordinates_l]]
-        # Now, map these to a snapped point containing each, with equivalent indicies.
-        snapped_points_l = [dict(location = lll, originalIndex = idx, placeId = "PLACE") for idx, lll in enumerate(latitude_longitude_literals_l)]
+        """For our fake api call, we'll simply process the incoming URL, find all the points provided, then return all those points as a Google response."""
+        # Find the path argument in the URL, then find every latitude & longitude pair within it.
+        path_argument = _PATH_ARGUMENT_RE.search(full_url).group(1)
+        # Now, map each pair to a snapped point containing a latitude longitude literal, with equivalent indicies.
+        snapped_points_l = [dict(location = dict(latitude = latitude, longitude = longitude), originalIndex = idx, placeId = "PLACE")
+            for idx, (latitude, longitude) in enumerate(_PATH_COORDINATES_RE.findall(path_argument))]
         # Now, build a snap to roads response compatible dict from all this.
         snap_to_roads_response_d = dict(
             snappedPoints = snapped_points_l, warningMessage = None)
@@ -99,8 +100,9 @@ class TestRoadsAPI(BaseWithDataCase):
         db.session.flush()
         # Determine the number of batches. Ceil total num points div num pts per batch.
         num_unsnapped_batches = math.ceil(new_order.static_num_points / config.NUM_POINTS_PER_SNAP_BATCH)
-        # Ensure the num unsnapped is equal to that on the property.
+        # Ensure the num unsnapped is equal to that on the property, both instance and expression.
         self.assertEqual(num_unsnapped_batches, new_order.num_unsnapped_batches)
+        self.assertEqual(num_unsnapped_batches, db.session.query(models.SnapToRoadOrder.num_unsnapped_batches).filter(models.SnapToRoadOrder.id == new_order.id).scalar())
         total_batches = list(roadsapi.iter_unsnapped_batches(new_order))
         # Ensure there's num_unsnapped_batches.
         self.assertEqual(len(total_batches), num_unsnapped_batches)
@@ -215,7 +217,7 @@ class TestRoadsAPI(BaseWithDataCase):
         Ensure there's 1 detail."""
         test_api_error_d = {"error": {"code": 403, "message": "Requests from this Android client application <empty> are blocked.", "status": "PERMISSION_DENIED", "details": [{"@type": "type.googleapis.com/google.rpc.ErrorInfo", "reason": "API_KEY_ANDROID_APP_BLOCKED", "domain": "googleapis.com", "metadata": {"consumer": "projects/XXXXXXXXXX", "service": "roads.googleapis.com"}}]}}
         # Load the error dict.
-        google_api_error = roadsapi.GoogleApiErrorSchema().load(test_api_error_d)
+        google_api_error = roadsapi.GOOGLE_API_ERROR_SCHEMA.load(test_api_error_d)
         # Now, ensure the code matches.
         self.assertEqual(google_api_error.error.code, 403)
         # Ensure status catches.
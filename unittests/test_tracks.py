@@ -1,23 +1,29 @@
 import os
+import unittest
 import time
 import json
+import orjson
 import base64
 
 from datetime import date, datetime, timedelta
 from flask import url_for
-from unittests.conftest import BaseWithDataCase
+from flask_login import login_user
+from unittests.conftest import BaseWithDataCase, RACES_DIR
 
 from app import db, config, factory, models, login_manager, tracks, races, error
 
+# The absolute path to the GPX file for a good race through yarra boulevard, used to simulate all races in this module.
+YARRA_BOULEVARD_GOOD_RACE_1 = os.path.join(RACES_DIR, "yarra_boulevard_good_race_1.gpx")
+
 
 class TestTracks(BaseWithDataCase):
+    shared_users = (
+        dict(email_address = "alden@mail.com", password = "password", username = "alden", vehicle = "1994 Toyota Supra"),
+        dict(email_address = "emily@mail.com", password = "password", username = "emily", vehicle = "1994 Toyota Supra"),)
+
     def test_loading_tracks(self):
-        # Create a new User.
-        aldos = factory.create_user("alden@mail.com", "password",
-            username = "alden", vehicle = "1994 Toyota Supra")
-        db.session.flush()
         # Test that we can load a track from GPX.
-        track_from_gpx = tracks.create_track_from_gpx("yarra_boulevard.gpx",
+        track_from_gpx = self.import_track_from_gpx("yarra_boulevard.gpx",
             intersection_check = False, is_snapped_to_roads = False, is_verified = False)
         print(track_from_gpx.track.path.hash)
         # Ensure that the track that's just been created, is not snapped to roads, but is verified.
@@ -26,8 +32,8 @@ class TestTracks(BaseWithDataCase):
         # Ensure the created track is a sprint type.
         self.assertEqual(track_from_gpx.track.track_type, models.Track.TYPE_SPRINT)
         # Test that we can load a track from JSON, that is already verified (no need to verify recorded attributes.)
-        with open(os.path.join(os.getcwd(), config.IMPORTS_PATH, "json-routes", "example2.json"), "r") as f:
-            example2_json = json.loads(f.read())
+        with open(os.path.join(os.getcwd(), config.IMPORTS_PATH, "json-routes", "example2.json"), "rb") as f:
+            example2_json = orjson.loads(f.read())
         track_from_json_2 = tracks.create_track_from_json(example2_json,
             is_verified = True, intersection_check = False)
         # Verify track path hash for both are not None.
@@ -36,66 +42,57 @@ class TestTracks(BaseWithDataCase):
         """TODO: some verifies here."""
         print(track_from_json_2.track_path.length)
     
+    @unittest.skip("Not yet implemented.")
     def test_can_be_raced(self):
         """"""
-        self.assertEqual(True, False)
 
     def test_ensure_interfering_tracks_fail(self):
-        """Create a new User.
+        """Get the shared User.
         Create a track.
         Attempt to create a different track, but one that has a start point within 10 meters of the first track.
         Ensure this attempt fails with TrackInspectionFailed."""
-        # Create a new User.
-        aldos = factory.create_user("alden@mail.com", "password",
-            username = "alden", vehicle = "1994 Toyota Supra")
-        db.session.flush()
+        # Get the shared User.
+        aldos = self.get_shared_user("alden@mail.com")
         # Load the yarra boulevard test track.
-        created_track = tracks.create_track_from_gpx("yarra_boulevard.gpx")
+        created_track = self.import_track_from_gpx("yarra_boulevard.gpx",
+            intersection_check = False)
         # Ensure this was successful.
         self.assertIsNotNone(created_track)
         created_track.set_owner(aldos)
-        db.session.flush()
         # Now, attempt to load the yarra boulevard track that is too close. Expect this raises a TrackInspectionFailed error.
         with self.assertRaises(tracks.TrackInspectionFailed) as tif:
-            tracks.create_track_from_gpx("yarra_boulevard_too_close.gpx",
+            self.import_track_from_gpx("yarra_boulevard_too_close.gpx",
                 relative_dir = config.TESTDATA_GPX_ROUTES_DIR)
 
     def test_page_leaderboard(self):
         """Import a test GPX route.
-        Create 2 Users.
+        Get the 2 shared Users.
         For User1 step through an entire race for the GPX route (successful attempt.)
         For User2 step through the same race but at 500 ms slower at each step.
         For User1 again, step through the same race but at 1000 ms slower at each step.
         Perform a query for the entire leaderboard from the given track.
         Expect the first track to come first, and have a finishing place of one.
         Expect the same for the next two being second and third place."""
-        # Create two new Users.
-        aldos = factory.create_user("alden@mail.com", "password",
-            username = "alden", vehicle = "1994 Toyota Supra")
-        emily = factory.create_user("emily@mail.com", "password",
-            username = "emily", vehicle = "1994 Toyota Supra")
+        # Get the two shared Users.
+        aldos = self.get_shared_user("alden@mail.com")
+        emily = self.get_shared_user("emily@mail.com")
         # Create a track.
-        created_track = tracks.create_track_from_gpx("yarra_boulevard.gpx")
+        created_track = self.import_track_from_gpx("yarra_boulevard.gpx",
+            intersection_check = False)
         created_track.set_owner(aldos)
         track = created_track.track
-        db.session.flush()
         # Now, for User1, step through the entire race yarra_boulevard_good_race_1.
-        race_first = self.simulate_entire_race(aldos, track, os.path.join(os.getcwd(), config.IMPORTS_PATH, "races", "yarra_boulevard_good_race_1.gpx"))
-        db.session.flush()
-        # Refresh aldos.
-        db.session.refresh(aldos)
+        race_first = self.simulate_entire_race(aldos, track, YARRA_BOULEVARD_GOOD_RACE_1)
         # Ensure aldos does not have an ongoing track.
         self.assertIsNone(aldos.ongoing_race)
         # Now for User2, step through the same race, but at 500 ms slower.
-        race_second = self.simulate_entire_race(emily, track, os.path.join(os.getcwd(), config.IMPORTS_PATH, "races", "yarra_boulevard_good_race_1.gpx"),
+        race_second = self.simulate_entire_race(emily, track, YARRA_BOULEVARD_GOOD_RACE_1,
             ms_adjustment = 500)
-        db.session.flush()
         # Ensure aldos does not have an ongoing track.
         self.assertIsNone(aldos.ongoing_race)
         # Now for User1 again, step through the same race, but at 1000ms slower.
-        race_third = self.simulate_entire_race(aldos, track, os.path.join(os.getcwd(), config.IMPORTS_PATH, "races", "yarra_boulevard_good_race_1.gpx"),
+        race_third = self.simulate_entire_race(aldos, track, YARRA_BOULEVARD_GOOD_RACE_1,
             ms_adjustment = 1000)
-        db.session.flush()
         # Check there are 3 races logged in the database.
         self.assertEqual(db.session.query(models.TrackUserRace).count(), 3)
         # Get the entire leaderboard for the track.
@@ -109,8 +106,8 @@ class TestTracks(BaseWithDataCase):
         # Third is place #3 and at the end.
         self.assertEqual(leaderboard[2].uid, race_third.uid)
         self.assertEqual(leaderboard[2].finishing_place, 3)
-        # Now, use the races module to locate all three leaderboard entries we've found above.
-        new_leaderboard = [races.get_race(race_uid = lb.uid, must_be_finished = True) for lb in leaderboard]
+        # Now, use the races module to locate all three leaderboard entries we've found above, at once.
+        new_leaderboard = races.get_races([lb.uid for lb in leaderboard], must_be_finished = True)
         # Ensure there's 3.
         self.assertEqual(len(new_leaderboard), 3)
         # Now, ensure the same UID -> finishing place test as above matches.
@@ -123,33 +120,62 @@ class TestTracks(BaseWithDataCase):
         self.assertEqual(new_leaderboard[2].uid, race_third.uid)
         self.assertEqual(new_leaderboard[2].finishing_place, 3)
 
+    def test_my_leaderboard(self):
+        """Import a test GPX route.
+        Get the 2 shared Users.
+        Create a finished race for User2, then two slower finished races for User1.
+        Perform a query for User1's leaderboard from the given track.
+        Expect only User1's two races, with their finishing places on the track's overall leaderboard; that is, second and third place."""
+        # Get the two shared Users.
+        aldos = self.get_shared_user("alden@mail.com")
+        emily = self.get_shared_user("emily@mail.com")
+        # Create a track.
+        created_track = self.import_track_from_gpx("yarra_boulevard.gpx",
+            intersection_check = False)
+        created_track.set_owner(aldos)
+        track = created_track.track
+        # Create three finished races; emily's is the fastest, then both of aldos'.
+        race_first, race_second, race_third = self.make_finished_track_user_races([
+            (track, emily, 1000, 61000,),
+            (track, aldos, 1000, 62000,),
+            (track, aldos, 1000, 63000,),])
+        # Get the leaderboard for the track, filtered to aldos' races.
+        with self.app.test_request_context():
+            login_user(aldos)
+            leaderboard = tracks.leaderboard_query_for(track,
+                filter_ = "my").all()
+        # Ensure there are 2 races, and both are aldos'.
+        self.assertEqual(len(leaderboard), 2)
+        # Ensure race second is first in aldos' leaderboard, but keeps its overall finishing place of #2.
+        self.assertEqual(leaderboard[0].uid, race_second.uid)
+        self.assertEqual(leaderboard[0].finishing_place, 2)
+        # Ensure race third is next, and keeps its overall finishing place of #3.
+        self.assertEqual(leaderboard[1].uid, race_third.uid)
+        self.assertEqual(leaderboard[1].finishing_place, 3)
+
     def test_ratings(self):
         """Import a test GPX route.
-        Create 11 Users.
+        Get the shared User, and create 10 more.
         Create 6 positive votes toward the track, and 4 negative.
         Call the ratings function to receive back the dictionary.
         Ensure the above conditions.
         Get the very first User in the random Users list. Call get_user_vote and ensure the value returned is False.
         Get the very last User in the random Users list. Confirm the opposite.
         Call get_user_vote with aldos. Ensure None is returned."""
-        # Create a new User.
-        aldos = factory.create_user("alden@mail.com", "password",
-            username = "alden", vehicle = "1994 Toyota Supra")
+        # Get the shared User.
+        aldos = self.get_shared_user("alden@mail.com")
         # Create 10 more random Users.
-        random_users = [factory.get_random_user() for x in range(10)]
-        db.session.flush()
+        random_users = factory.get_random_users(10)
         # Test that we can load a track from GPX, and set its owner to aldos. 
-        track_from_gpx = tracks.create_track_from_gpx("example1.gpx",
+        track_from_gpx = self.import_track_from_gpx("example1.gpx",
             intersection_check = False)
         track_from_gpx.set_owner(aldos)
+        # Flush the new Users and track, so their IDs can be used below.
         db.session.flush()
         # Get track.
         track = track_from_gpx.track
-        # Now, for all 4 of the 10 Users, create negative TrackRatings, and positive TrackRatings for the balance.
-        for user in random_users[:4]:
-            db.session.add(models.TrackRating(track_id = track.id, user_id = user.id, rating = False))
-        for user in random_users[4:]:
-            db.session.add(models.TrackRating(track_id = track.id, user_id = user.id, rating = True))
+        # Now, for all 4 of the 10 Users, create negative TrackRatings, and positive TrackRatings for the balance. Add all at once, so they're inserted together.
+        db.session.add_all([models.TrackRating(track_id = track.id, user_id = user.id, rating = idx >= 4) for idx, user in enumerate(random_users)])
         db.session.flush()
         # Now, call the ratings function.
         ratings = tracks.get_ratings_for(track)
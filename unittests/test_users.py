@@ -1,6 +1,5 @@
 import os
 import time
-import uuid
 import json
 import base64
 
@@ -24,8 +23,26 @@ class TestUsers(BaseWithDataCase):
         _, new_player = self.make_user_player(aldos)
         # Now, manually create a new UserPlayer, and set its key.
         new_player_dup = models.UserPlayer()
-        new_player_dup.set_key(aldos, uuid.uuid4().hex.lower(), uuid.uuid4().hex.lower())
+        new_player_dup.set_key(aldos, os.urandom(16).hex(), os.urandom(16).hex())
         # Now add the new player to the session and flush. This should cause integ error.
         with self.assertRaises(IntegrityError) as ie:
             db.session.add(new_player_dup)
-            db.session.flush()
\ No newline at end of file
+            db.session.flush()
+
+    def test_default_password_hash(self):
+        """Ensure that, with no password hash method configured, passwords are hashed with Werkzeug's default method and can still be checked. All other tests
+        hash passwords with the cheap test method."""
+        # Temporarily clear the configured password hash method.
+        test_password_hash_method = config.PASSWORD_HASH_METHOD
+        config.PASSWORD_HASH_METHOD = None
+        try:
+            # Create a new User.
+            aldos = factory.create_user("alden@mail.com", "password",
+                username = "alden", vehicle = "1994 Toyota Supra")
+            db.session.flush()
+        finally:
+            config.PASSWORD_HASH_METHOD = test_password_hash_method
+        # Ensure the password was not hashed with the test method; the method is terminated by a dollar sign, so Werkzeug defaults such as pbkdf2:sha256:150000 do not match. Then ensure it can be checked.
+        self.assertEqual(aldos.password.startswith(test_password_hash_method + "$"), False)
+        self.assertEqual(aldos.check_password("password"), True)
+        self.assertEqual(aldos.check_password("notpassword"), False)
@@ -13,6 +13,8 @@ from app import db, config, factory, models, vehicles, error, world
 
 
 class TestVehicles(BaseWithDataCase):
+    shared_users = (dict(email_address = "alden@mail.com", password = "password", username = "alden", vehicle = "1994 Toyota Supra"),)
+
     def test_find_vehicle_stock(self):
         """Test the various search methods for a vehicle stock."""
         # Now, search for a '1994 Toyota Supra' by that exact same text.
@@ -34,7 +36,7 @@ class TestVehicles(BaseWithDataCase):
         # Ensure result has two results.
         self.assertEqual(len(all_vehicle_makes), 2)
         # Filter all vehicle makes to just Toyota.
-        toyota = next(filter(lambda mk: mk.name == "Toyota", all_vehicle_makes))
+        toyota = {mk.name: mk for mk in all_vehicle_makes}["Toyota"]
         # Ensure logo is not None.
         self.assertIsNotNone(toyota.logo)
         # Now, get all types within this make, by supplying the make UID.
@@ -43,21 +45,21 @@ class TestVehicles(BaseWithDataCase):
         # Ensure result has one result.
         self.assertEqual(len(toyota_types), 1)
         # Filter all vehicle types to car.
-        toyota_car = next(filter(lambda t: t.type_id == "car", toyota_types))
+        toyota_car = {t.type_id: t for t in toyota_types}["car"]
         # Now, search for all models of this type from this make.
         toyota_car_models = vehicles.search_vehicles(
             make_uid = toyota.uid, type_id = toyota_car.type_id).all()
         # Ensure result has 4 results.
         self.assertEqual(len(toyota_car_models), 4)
         # Filter all vehicle models to Supra.
-        toyota_car_supra = next(filter(lambda m: m.name == "Supra", toyota_car_models))
+        toyota_car_supra = {m.name: m for m in toyota_car_models}["Supra"]
         # Now search for all available years for this model.
         available_years = vehicles.search_vehicles(
             make_uid = toyota.uid, type_id = toyota_car.type_id, model_uid = toyota_car_supra.uid).all()
         # Ensure result has 18 results.
         self.assertEqual(len(available_years), 18)
         # Filter all vehicle years to 1994.
-        toyota_car_supra_1994 = next(filter(lambda y: y.year == 1994, available_years))
+        toyota_car_supra_1994 = {y.year: y for y in available_years}[1994]
         # Now, get all options for supra in 1994.
         all_supra_options = vehicles.search_vehicles(
             make_uid = toyota.uid, type_id = toyota_car.type_id, model_uid = toyota_car_supra.uid, year = toyota_car_supra_1994.year).all()
@@ -77,17 +79,17 @@ class TestVehicles(BaseWithDataCase):
         Ensure the User does not have a vehicle in use.
         Set the vehicle above to the one in use by the User.
         Ensure the User has a vehicle in use."""
-        # Create a new User, setup.
-        aldos = factory.create_user("alden@mail.com", "password",
-            username = "alden", vehicle = "1994 Toyota Supra")
-        db.session.flush()
+        # Get the shared User.
+        aldos = self.get_shared_user("alden@mail.com")
         # Ensure aldos has 1 vehicle.
         self.assertEqual(aldos.num_vehicles, 1)
         # Get that one Vehicle.
         vehicle = aldos.vehicles.first()
         # Now, set this User up as if they have a Player.
         _, new_player = self.make_user_player(aldos)
-        db.session.refresh(aldos)
+        # Expire the Player relationship, and the current vehicle on the new Player, so both are reloaded when aldos' current vehicle is next read.
+        db.session.expire(aldos, ["player_"])
+        db.session.expire(new_player, ["current_vehicle"])
         # Now, ensure aldos' current vehicle is None.
         self.assertIsNone(aldos.current_vehicle)
         # Set the vehicle as aldos' current vehicle.
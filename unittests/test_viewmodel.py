@@ -11,15 +11,15 @@ from app import db, config, factory, models, login_manager, tracks, error, viewm
 
 
 class TestUserViewModel(BaseWithDataCase):
+    shared_users = (dict(email_address = "alden@mail.com", password = "password", username = "alden", vehicle = "1994 Toyota Supra"),)
+
     def test_user_view_model_basics(self):
         """Test all functionality on the vehicle view model.
         Create a new User, provide them with a single vehicle.
         Create a user view model for that User from the perspective of the same User.
         Check that is you returns True."""
-        # Create a new User.
-        aldos = factory.create_user("alden@mail.com", "password",
-            username = "alden", vehicle = "1994 Toyota Supra")
-        db.session.flush()
+        # Get the shared User.
+        aldos = self.get_shared_user("alden@mail.com")
         # Create a user view model for this User.
         user_view_model = viewmodel.UserViewModel(aldos, aldos)
         # Ensure is you is True.
@@ -27,14 +27,14 @@ class TestUserViewModel(BaseWithDataCase):
 
 
 class TestVehicleViewModel(BaseWithDataCase):
+    shared_users = (dict(email_address = "alden@mail.com", password = "password", username = "alden", vehicle = "1994 Toyota Supra"),)
+
     def test_vehicle_view_model_basics(self):
         """Test all functionality on the vehicle view model.
         Create a new User, provide them with a single vehicle.
         Create a vehicle view model for that User's first vehicle."""
-        # Create a new User.
-        aldos = factory.create_user("alden@mail.com", "password",
-            username = "alden", vehicle = "1994 Toyota Supra")
-        db.session.flush()
+        # Get the shared User.
+        aldos = self.get_shared_user("alden@mail.com")
         # Get that User's vehicles.
         all_vehicles = aldos.all_vehicles
         # Now, create a view model for the first one.
@@ -42,12 +42,12 @@ class TestVehicleViewModel(BaseWithDataCase):
 
 
 class TestTrackViewModel(BaseWithDataCase):
+    shared_users = (dict(email_address = "alden@mail.com", password = "password", username = "alden", vehicle = "1994 Toyota Supra"),)
+
     def test_track_view_model_basics(self):
         """Import an example track; yarraboulevard."""
-        # Create a new User.
-        aldos = factory.create_user("alden@mail.com", "password",
-            username = "alden", vehicle = "1994 Toyota Supra")
-        db.session.flush()
+        # Get the shared User.
+        aldos = self.get_shared_user("alden@mail.com")
         # Load the yarra boulevard test track.
         track = self.create_track_from_gpx(aldos, "yarra_boulevard.gpx")
         # Now, create a new viewmodel and serialise it.
@@ -70,12 +70,12 @@ class TestTrackViewModel(BaseWithDataCase):
         # Second place, user2; started 2020/10/16 22:55:01 finished 2020/10/16 23:02:26, this will occupy second spot.
         # Third place, user1; started 2020/10/16 23:05:01 finished 2020/10/16 23:13:26, this will occupy third spot.
         # Fourth place, user3; started 2020/10/16 23:20:01 finished 2020/10/16 23:36:26, this will occupy fourth spot.
-        track_user_races = [
-            self.make_finished_track_user_race(track, user1, 1602762301000, 1602762481000),
-            self.make_finished_track_user_race(track, user2, 1602849301000, 1602849721000),
-            self.make_finished_track_user_race(track, user1, 1602849901000, 1602850381000),
-            self.make_finished_track_user_race(track, user3, 1602850801000, 1602851761000)
-        ]
+        track_user_races = self.make_finished_track_user_races([
+            (track, user1, 1602762301000, 1602762481000,),
+            (track, user2, 1602849301000, 1602849721000,),
+            (track, user1, 1602849901000, 1602850381000,),
+            (track, user3, 1602850801000, 1602851761000,)
+        ])
         db.session.flush()
         # Now, create a new track view model from user1 to the track.
         track_view_model = viewmodel.TrackViewModel(user1, track)
@@ -98,4 +98,9 @@ class TestTrackViewModel(BaseWithDataCase):
         self.assertEqual(leaderboard_l[0]["finishing_place"], 1)
         self.assertEqual(leaderboard_l[1]["finishing_place"], 2)
         self.assertEqual(leaderboard_l[2]["finishing_place"], 3)
+        # Now, create a track view model given the top leaderboard entries, as if already queried. Ensure the same top leaderboard is produced from those.
+        top_leaderboard_entries = tracks.leaderboard_query_for(track).limit(3).all()
+        given_top_leaderboard_vml = viewmodel.TrackViewModel(user1, track,
+            top_leaderboard_entries = top_leaderboard_entries).top_leaderboard
+        self.assertEqual([entry.finishing_place for entry in given_top_leaderboard_vml.items], [1, 2, 3])
 
@@ -100,7 +100,7 @@ class TestWorld(BaseWithDataCase):
         aldos = factory.create_user("alden@mail.com", "password",
             username = "alden", vehicle = "1994 Toyota Supra")
         # Create a new track from example1.
-        tracks.create_track_from_gpx("example1.gpx")
+        self.import_track_from_gpx("example1.gpx")
         db.session.flush()
         # Create a viewport, containing example1.
         viewport_1_d = dict(